@@ -1,10 +1,14 @@
 package com.curiosity.executor.controller;
 
 import com.curiosity.executor.service.DatabaseInspector;
+import com.curiosity.executor.service.SchemaChangeMonitor;
 import com.curiosity.executor.service.SqlExecutorService;
+import com.fasterxml.jackson.core.JsonProcessingException;
+import org.springframework.dao.QueryTimeoutException;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
 
-import java.sql.SQLException;
 import java.util.List;
 import java.util.Map;
 
@@ -12,27 +16,75 @@ import java.util.Map;
 @RequestMapping("/mcp")
 public class MCPController {
 
+    // Absolute deadline (epoch milliseconds) and request id sent by the orchestrator
+    private static final String DEADLINE_HEADER = "X-Request-Deadline";
+    private static final String REQUEST_ID_HEADER = "X-Request-Id";
+
     private final DatabaseInspector databaseInspector;
     private final SqlExecutorService sqlExecutorService;
+    private final SchemaChangeMonitor schemaChangeMonitor;
 
-    public MCPController(DatabaseInspector databaseInspector, SqlExecutorService sqlExecutorService) {
+    public MCPController(DatabaseInspector databaseInspector, SqlExecutorService sqlExecutorService,
+                         SchemaChangeMonitor schemaChangeMonitor) {
         this.databaseInspector = databaseInspector;
         this.sqlExecutorService = sqlExecutorService;
+        this.schemaChangeMonitor = schemaChangeMonitor;
     }
 
     @PostMapping("/execute_sql_query")
-    public List<Map<String, Object>> executeSqlQuery(@RequestBody Map<String, String> payload) {
+    public List<Map<String, Object>> executeSqlQuery(
+            @RequestBody Map<String, String> payload,
+            @RequestHeader(value = DEADLINE_HEADER, required = false) Long deadlineMs,
+            @RequestHeader(value = REQUEST_ID_HEADER, required = false) String requestId) {
         String sql = payload.get("sql");
         if (sql == null || sql.trim().isEmpty()) {
             throw new IllegalArgumentException("SQL query is required");
         }
-        return sqlExecutorService.executeQuery(sql);
+        Long timeoutMs = deadlineMs != null ? deadlineMs - System.currentTimeMillis() : null;
+        return sqlExecutorService.executeQuery(sql, requestId, timeoutMs);
+    }
+
+    @PostMapping("/cancel_query")
+    public Map<String, Object> cancelQuery(@RequestBody Map<String, String> payload) {
+        String requestId = payload.get("request_id");
+        if (requestId == null || requestId.isBlank()) {
+            throw new IllegalArgumentException("request_id is required");
+        }
+        return Map.of("cancelled", sqlExecutorService.cancelQuery(requestId));
+    }
+
+    @GetMapping("/metrics")
+    public Map<String, Object> metrics() {
+        return sqlExecutorService.getMetrics();
+    }
+
+    @ExceptionHandler(QueryTimeoutException.class)
+    public ResponseEntity<Map<String, String>> handleQueryTimeout(QueryTimeoutException e) {
+        return ResponseEntity.status(HttpStatus.GATEWAY_TIMEOUT).body(Map.of("error", e.getMessage()));
+    }
+
+    @PostMapping("/explain_sql_query")
+    public Map<String, Object> explainSqlQuery(@RequestBody Map<String, String> payload) throws JsonProcessingException {
+        String sql = payload.get("sql");
+        if (sql == null || sql.trim().isEmpty()) {
+            throw new IllegalArgumentException("SQL query is required");
+        }
+        return sqlExecutorService.explainQuery(sql);
     }
 
     @PostMapping("/refresh_schema_metadata")
-    public List<Map<String, Object>> refreshSchemaMetadata(@RequestBody Map<String, String> payload) throws SQLException {
+    public List<Map<String, Object>> refreshSchemaMetadata(@RequestBody Map<String, Object> payload) {
         // In future, payload would contain sourceId.
         // For now, we refresh the default datasource schema.
+        // An optional "tables" list limits extraction to those tables (targeted re-indexing).
+        if (payload.get("tables") instanceof List<?> tables) {
+            return databaseInspector.extractSchemaMetadata(tables.stream().map(String::valueOf).toList());
+        }
         return databaseInspector.extractSchemaMetadata();
     }
+
+    @GetMapping("/schema_watch")
+    public Map<String, Object> schemaWatch() {
+        return schemaChangeMonitor.getStatus();
+    }
 }
@@ -1,93 +1,333 @@
 package com.curiosity.executor.service;
 
+import jakarta.annotation.PreDestroy;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.jdbc.core.ColumnMapRowMapper;
+import org.springframework.jdbc.core.ConnectionCallback;
 import org.springframework.jdbc.core.JdbcTemplate;
+import org.springframework.jdbc.core.RowCallbackHandler;
+import org.springframework.jdbc.core.RowMapperResultSetExtractor;
 import org.springframework.stereotype.Service;
-import javax.sql.DataSource;
-import java.sql.Connection;
-import java.sql.DatabaseMetaData;
 import java.sql.ResultSet;
-import java.sql.SQLException;
+import java.sql.Statement;
 import java.util.ArrayList;
+import java.util.Collection;
 import java.util.Collections;
 import java.util.HashMap;
+import java.util.LinkedHashMap;
 import java.util.List;
+import java.util.Locale;
 import java.util.Map;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
 import java.util.stream.Collectors;
 
 @Service
 public class DatabaseInspector {
 
-    private final DataSource dataSource;
     private final JdbcTemplate jdbcTemplate;
 
     private static final int SAMPLE_ROW_LIMIT = 5;
+    // Rows TABLESAMPLE should yield on average, so LIMIT is still met when blocks are sparse
+    private static final int SAMPLE_TARGET_ROWS = 100;
 
-    public DatabaseInspector(DataSource dataSource, JdbcTemplate jdbcTemplate) {
-        this.dataSource = dataSource;
+    // Regular and partitioned tables; individual partitions are folded into their parent
+    private static final String TABLE_FILTER =
+            "n.nspname = 'public' AND %1$s.relkind IN ('r', 'p') AND NOT %1$s.relispartition";
+
+    private static final String TABLES_SQL =
+            "SELECT c.relname AS table_name, "
+                    // Unknown (-1) if any partition was never analyzed, rather than an undercount
+                    + "CASE WHEN c.relkind = 'p' THEN "
+                    + "  (SELECT CASE WHEN bool_or(ch.reltuples < 0) THEN -1 "
+                    + "          ELSE COALESCE(SUM(ch.reltuples), 0)::bigint END "
+                    + "   FROM pg_inherits i JOIN pg_class ch ON ch.oid = i.inhrelid WHERE i.inhparent = c.oid) "
+                    + "ELSE c.reltuples::bigint END AS row_estimate, "
+                    + "CASE WHEN c.relkind = 'p' THEN pg_get_partkeydef(c.oid) END AS partition_key, "
+                    + "(SELECT COUNT(*) FROM pg_inherits i WHERE i.inhparent = c.oid) AS partition_count "
+                    + "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    + "WHERE " + String.format(TABLE_FILTER, "c");
+
+    private static final String COLUMNS_SQL =
+            "SELECT c.relname AS table_name, a.attname AS column_name, t.typname AS type_name, "
+                    + "a.attnotnull AS not_null "
+                    + "FROM pg_attribute a "
+                    + "JOIN pg_class c ON c.oid = a.attrelid "
+                    + "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    + "JOIN pg_type t ON t.oid = a.atttypid "
+                    + "WHERE " + String.format(TABLE_FILTER, "c") + " AND a.attnum > 0 AND NOT a.attisdropped";
+
+    private static final String INDEXES_SQL =
+            "SELECT t.relname AS table_name, i.relname AS index_name, ix.indisprimary AS is_primary, "
+                    + "ix.indisunique AS is_unique, pg_get_indexdef(ix.indexrelid) AS definition, "
+                    + "ARRAY(SELECT a.attname FROM unnest(ix.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) "
+                    + "      JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum "
+                    + "      ORDER BY k.ord)::text[] AS columns "
+                    + "FROM pg_index ix "
+                    + "JOIN pg_class t ON t.oid = ix.indrelid "
+                    + "JOIN pg_class i ON i.oid = ix.indexrelid "
+                    + "JOIN pg_namespace n ON n.oid = t.relnamespace "
+                    + "WHERE " + String.format(TABLE_FILTER, "t");
+
+    private static final String FOREIGN_KEYS_SQL =
+            "SELECT src.relname AS table_name, sa.attname AS fk_column, "
+                    + "tgt.relname AS target_table, ta.attname AS pk_column "
+                    + "FROM pg_constraint con "
+                    + "JOIN pg_class src ON src.oid = con.conrelid "
+                    + "JOIN pg_namespace n ON n.oid = src.relnamespace "
+                    + "JOIN pg_class tgt ON tgt.oid = con.confrelid "
+                    + "CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(src_att, tgt_att) "
+                    + "JOIN pg_attribute sa ON sa.attrelid = con.conrelid AND sa.attnum = k.src_att "
+                    + "JOIN pg_attribute ta ON ta.attrelid = con.confrelid AND ta.attnum = k.tgt_att "
+                    + "WHERE con.contype = 'f' AND n.nspname = 'public'";
+
+    private static final String STATS_SQL =
+            "SELECT tablename, attname, null_frac, n_distinct, most_common_vals::text AS most_common_vals "
+                    + "FROM pg_stats WHERE schemaname = 'public'";
+
+    // One digest per table over everything extraction reads from the catalog:
+    // columns and types, constraints, indexes, partitions and the table comment
+    private static final String FINGERPRINTS_SQL =
+            "SELECT c.relname AS table_name, md5(concat_ws('|', "
+                    + "  (SELECT string_agg(a.attname || ' ' || format_type(a.atttypid, a.atttypmod) "
+                    + "     || CASE WHEN a.attnotnull THEN ' not null' ELSE '' END, ',' ORDER BY a.attnum) "
+                    + "   FROM pg_attribute a WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped), "
+                    + "  (SELECT string_agg(con.conname || ' ' || pg_get_constraintdef(con.oid), ',' ORDER BY con.conname) "
+                    + "   FROM pg_constraint con WHERE con.conrelid = c.oid), "
+                    + "  (SELECT string_agg(pg_get_indexdef(ix.indexrelid), ',' ORDER BY ix.indexrelid) "
+                    + "   FROM pg_index ix WHERE ix.indrelid = c.oid), "
+                    + "  (SELECT string_agg(i.inhrelid::regclass::text, ',' ORDER BY i.inhrelid) "
+                    + "   FROM pg_inherits i WHERE i.inhparent = c.oid), "
+                    + "  obj_description(c.oid, 'pg_class'))) AS fingerprint "
+                    + "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    + "WHERE " + String.format(TABLE_FILTER, "c");
+
+    private final int sampleTimeoutMs;
+    private final long smallTableRows;
+    private final ExecutorService samplingPool;
+
+    public DatabaseInspector(JdbcTemplate jdbcTemplate,
+                             @Value("${curiosity.sampling.statement-timeout-ms:2000}") int sampleTimeoutMs,
+                             @Value("${curiosity.sampling.small-table-rows:10000}") long smallTableRows,
+                             @Value("${curiosity.sampling.parallelism:4}") int samplingParallelism) {
         this.jdbcTemplate = jdbcTemplate;
+        this.sampleTimeoutMs = sampleTimeoutMs;
+        this.smallTableRows = smallTableRows;
+        this.samplingPool = Executors.newFixedThreadPool(samplingParallelism);
+    }
+
+    @PreDestroy
+    public void shutdown() {
+        samplingPool.shutdownNow();
+    }
+
+    /**
+     * Extracts columns, constraint flags, foreign keys, indexes and planner
+     * statistics for every table in the {@code public} schema using one bulk
+     * catalog query per kind, then fetches sample rows on a parallel pool.
+     *
+     * Each table is returned as a map with {@code name}, {@code columns}
+     * (with {@code primaryKey}, {@code notNull}, {@code unique} flags),
+     * {@code foreign_keys}, {@code indexes}, {@code partitioning} (null for
+     * regular tables), {@code stats} and {@code sample_rows}, the shape the
+     * explorer's ingestion pipeline reads.
+     */
+    public List<Map<String, Object>> extractSchemaMetadata() {
+        return extractSchemaMetadata(null);
     }
 
-    public List<Map<String, Object>> extractSchemaMetadata() throws SQLException {
-        List<Map<String, Object>> schemaInfo = new ArrayList<>();
-        try (Connection conn = dataSource.getConnection()) {
-            DatabaseMetaData metaData = conn.getMetaData();
-            // Get all user tables
-            ResultSet tables = metaData.getTables(null, "public", "%", new String[]{"TABLE"});
-
-            while (tables.next()) {
-                String tableName = tables.getString("TABLE_NAME");
-                Map<String, Object> tableData = new HashMap<>();
-                tableData.put("name", tableName);
-
-                List<Map<String, String>> columns = getColumns(metaData, tableName);
-                tableData.put("columns", columns);
-                tableData.put("foreign_keys", getForeignKeys(metaData, tableName));
-
-                // Fetch random sample rows for LLM enrichment context
-                List<String> columnNames = columns.stream()
-                        .map(c -> c.get("name"))
-                        .collect(Collectors.toList());
-                tableData.put("sample_rows", getSampleRows(tableName, columnNames));
-
-                schemaInfo.add(tableData);
+    /**
+     * Same as {@link #extractSchemaMetadata()}, restricted to the named tables
+     * when {@code onlyTables} is non-null. Used for targeted re-indexing after
+     * a schema change, so unchanged tables are neither queried nor sampled.
+     */
+    public List<Map<String, Object>> extractSchemaMetadata(Collection<String> onlyTables) {
+        Map<String, Map<String, Object>> tables = new LinkedHashMap<>();
+        queryCatalog(TABLES_SQL, "c.relname", "c.relname", onlyTables, rs -> {
+            Map<String, Object> tableData = new HashMap<>();
+            tableData.put("name", rs.getString("table_name"));
+            tableData.put("columns", new ArrayList<Map<String, Object>>());
+            tableData.put("foreign_keys", new ArrayList<Map<String, String>>());
+            tableData.put("indexes", new ArrayList<Map<String, Object>>());
+            Map<String, Object> stats = new HashMap<>();
+            stats.put("row_estimate", rs.getLong("row_estimate"));
+            stats.put("columns", new HashMap<String, Object>());
+            tableData.put("stats", stats);
+            Map<String, Object> partitioning = null;
+            if (rs.getString("partition_key") != null) {
+                partitioning = new HashMap<>();
+                partitioning.put("key", rs.getString("partition_key"));
+                partitioning.put("partitions", rs.getLong("partition_count"));
+            }
+            tableData.put("partitioning", partitioning);
+            tables.put(rs.getString("table_name"), tableData);
+        });
+
+        // Columns, keyed by table then column name so constraint flags can be applied
+        Map<String, Map<String, Map<String, Object>>> columnsByTable = new HashMap<>();
+        queryCatalog(COLUMNS_SQL, "c.relname", "c.relname, a.attnum", onlyTables, rs -> {
+            Map<String, Object> tableData = tables.get(rs.getString("table_name"));
+            if (tableData == null) {
+                return;
+            }
+            Map<String, Object> col = new HashMap<>();
+            col.put("name", rs.getString("column_name"));
+            col.put("type", rs.getString("type_name"));
+            col.put("notNull", rs.getBoolean("not_null"));
+            col.put("primaryKey", false);
+            col.put("unique", false);
+            columnList(tableData).add(col);
+            columnsByTable.computeIfAbsent(rs.getString("table_name"), k -> new HashMap<>())
+                    .put(rs.getString("column_name"), col);
+        });
+
+        // Indexes; primary-key and single-column unique indexes back the constraint flags
+        queryCatalog(INDEXES_SQL, "t.relname", "t.relname, i.relname", onlyTables, rs -> {
+            String tableName = rs.getString("table_name");
+            Map<String, Object> tableData = tables.get(tableName);
+            if (tableData == null) {
+                return;
             }
+            List<String> indexColumns = List.of((String[]) rs.getArray("columns").getArray());
+            boolean isPrimary = rs.getBoolean("is_primary");
+            boolean isUnique = rs.getBoolean("is_unique");
+
+            Map<String, Object> index = new HashMap<>();
+            index.put("name", rs.getString("index_name"));
+            index.put("columns", indexColumns);
+            index.put("primary", isPrimary);
+            index.put("unique", isUnique);
+            index.put("definition", rs.getString("definition"));
+            indexList(tableData).add(index);
+
+            Map<String, Map<String, Object>> cols = columnsByTable.getOrDefault(tableName, Collections.emptyMap());
+            if (isPrimary) {
+                indexColumns.forEach(c -> {
+                    if (cols.containsKey(c)) {
+                        cols.get(c).put("primaryKey", true);
+                    }
+                });
+            } else if (isUnique && indexColumns.size() == 1 && cols.containsKey(indexColumns.get(0))) {
+                cols.get(indexColumns.get(0)).put("unique", true);
+            }
+        });
+
+        queryCatalog(FOREIGN_KEYS_SQL, "src.relname", "src.relname, con.conname", onlyTables, rs -> {
+            Map<String, Object> tableData = tables.get(rs.getString("table_name"));
+            if (tableData == null) {
+                return;
+            }
+            Map<String, String> fk = new HashMap<>();
+            fk.put("target_table", rs.getString("target_table"));
+            fk.put("fk_column", rs.getString("fk_column"));
+            fk.put("pk_column", rs.getString("pk_column"));
+            // Names read by the explorer's ingestion pipeline
+            fk.put("column", rs.getString("fk_column"));
+            fk.put("target_column", rs.getString("pk_column"));
+            foreignKeyList(tableData).add(fk);
+        });
+
+        // Planner statistics double as enrichment context and drive the sampling strategy
+        try {
+            queryCatalog(STATS_SQL, "tablename", null, onlyTables, rs -> {
+                Map<String, Object> tableData = tables.get(rs.getString("tablename"));
+                if (tableData == null) {
+                    return;
+                }
+                Map<String, Object> col = new HashMap<>();
+                col.put("null_frac", rs.getDouble("null_frac"));
+                col.put("n_distinct", rs.getDouble("n_distinct"));
+                col.put("most_common_vals", rs.getString("most_common_vals"));
+                columnStats(tableData).put(rs.getString("attname"), col);
+            });
+        } catch (Exception e) {
+            // Non-fatal — statistics are best-effort enrichment context
+            System.err.println("[DatabaseInspector] Could not read planner statistics: " + e.getMessage());
         }
-        return schemaInfo;
-    }
 
-    private List<Map<String, String>> getColumns(DatabaseMetaData metaData, String tableName) throws SQLException {
-        List<Map<String, String>> columns = new ArrayList<>();
-        ResultSet rs = metaData.getColumns(null, "public", tableName, "%");
-        while (rs.next()) {
-            Map<String, String> col = new HashMap<>();
-            col.put("name", rs.getString("COLUMN_NAME"));
-            col.put("type", rs.getString("TYPE_NAME"));
-            columns.add(col);
+        // Sample rows are independent per table, so fetch them in parallel
+        List<CompletableFuture<Void>> samples = new ArrayList<>();
+        for (Map<String, Object> tableData : tables.values()) {
+            String tableName = (String) tableData.get("name");
+            List<String> columnNames = columnList(tableData).stream()
+                    .map(c -> (String) c.get("name"))
+                    .collect(Collectors.toList());
+            long rowEstimate = (Long) ((Map<?, ?>) tableData.get("stats")).get("row_estimate");
+            samples.add(CompletableFuture
+                    .supplyAsync(() -> getSampleRows(tableName, columnNames, rowEstimate), samplingPool)
+                    .thenAccept(rows -> tableData.put("sample_rows", rows)));
         }
-        return columns;
+        CompletableFuture.allOf(samples.toArray(new CompletableFuture[0])).join();
+
+        return new ArrayList<>(tables.values());
     }
 
-    private List<Map<String, String>> getForeignKeys(DatabaseMetaData metaData, String tableName) throws SQLException {
-        List<Map<String, String>> fks = new ArrayList<>();
-        ResultSet rs = metaData.getImportedKeys(null, "public", tableName);
-        while (rs.next()) {
-            Map<String, String> fk = new HashMap<>();
-            fk.put("target_table", rs.getString("PKTABLE_NAME"));
-            fk.put("fk_column", rs.getString("FKCOLUMN_NAME"));
-            fk.put("pk_column", rs.getString("PKCOLUMN_NAME"));
-            fks.add(fk);
+    /**
+     * Returns a catalog fingerprint per table. Any DDL that changes what
+     * {@link #extractSchemaMetadata()} reports for a table changes its
+     * fingerprint; data changes do not.
+     */
+    public Map<String, String> schemaFingerprints() {
+        Map<String, String> fingerprints = new HashMap<>();
+        jdbcTemplate.query(FINGERPRINTS_SQL, rs -> {
+            fingerprints.put(rs.getString("table_name"), rs.getString("fingerprint"));
+        });
+        return fingerprints;
+    }
+
+    /**
+     * Runs a catalog query, optionally narrowed to the given tables by an
+     * extra {@code tableColumn = ANY(?)} predicate, then ordered.
+     */
+    private void queryCatalog(String sql, String tableColumn, String orderBy,
+                              Collection<String> onlyTables, RowCallbackHandler handler) {
+        String orderClause = orderBy != null ? " ORDER BY " + orderBy : "";
+        if (onlyTables == null) {
+            jdbcTemplate.query(sql + orderClause, handler);
+            return;
         }
-        return fks;
+        jdbcTemplate.query(
+                sql + " AND " + tableColumn + "::text = ANY(?)" + orderClause,
+                ps -> ps.setArray(1, ps.getConnection().createArrayOf("text", onlyTables.toArray())),
+                handler
+        );
+    }
+
+    @SuppressWarnings("unchecked")
+    private static List<Map<String, Object>> columnList(Map<String, Object> tableData) {
+        return (List<Map<String, Object>>) tableData.get("columns");
+    }
+
+    @SuppressWarnings("unchecked")
+    private static List<Map<String, Object>> indexList(Map<String, Object> tableData) {
+        return (List<Map<String, Object>>) tableData.get("indexes");
+    }
+
+    @SuppressWarnings("unchecked")
+    private static List<Map<String, String>> foreignKeyList(Map<String, Object> tableData) {
+        return (List<Map<String, String>>) tableData.get("foreign_keys");
+    }
+
+    @SuppressWarnings("unchecked")
+    private static Map<String, Object> columnStats(Map<String, Object> tableData) {
+        return (Map<String, Object>) ((Map<String, Object>) tableData.get("stats")).get("columns");
     }
 
     /**
-     * Fetches up to {@link #SAMPLE_ROW_LIMIT} randomly-selected rows from the
-     * given table. These example rows give the LLM enrichment step in the
-     * explorer service concrete data to infer domain semantics from.
+     * Fetches up to {@link #SAMPLE_ROW_LIMIT} sample rows from the given
+     * table. These example rows give the LLM enrichment step in the explorer
+     * service concrete data to infer domain semantics from.
+     *
+     * Large tables are sampled with {@code TABLESAMPLE SYSTEM}, sized from the
+     * planner's row estimate so only a handful of blocks are read regardless
+     * of table size. Small or never-analyzed tables use a plain {@code LIMIT},
+     * which stops after the first rows. Every query runs under a per-table
+     * {@code statement_timeout}.
      *
-     * Returns an empty list if the query fails (e.g. empty table, permissions).
+     * Returns an empty list if the query fails (e.g. empty table, permissions, timeout).
      */
-    private List<Map<String, Object>> getSampleRows(String tableName, List<String> columnNames) {
+    private List<Map<String, Object>> getSampleRows(String tableName, List<String> columnNames, long rowEstimate) {
         if (columnNames == null || columnNames.isEmpty()) {
             return Collections.emptyList();
         }
@@ -97,12 +337,24 @@ public class DatabaseInspector {
                     .map(c -> "\"" + c + "\"")
                     .collect(Collectors.joining(", "));
 
+            if (rowEstimate >= smallTableRows) {
+                double percent = Math.min(100.0, 100.0 * SAMPLE_TARGET_ROWS / rowEstimate);
+                String sql = String.format(Locale.ROOT,
+                        "SELECT %s FROM \"%s\" TABLESAMPLE SYSTEM (%.6f) LIMIT %d",
+                        cols, tableName, percent, SAMPLE_ROW_LIMIT
+                );
+                List<Map<String, Object>> rows = queryWithTimeout(sql);
+                if (rows.size() >= SAMPLE_ROW_LIMIT) {
+                    return rows;
+                }
+                // Stale statistics or sparse blocks — fall through to a plain LIMIT
+            }
+
             String sql = String.format(
-                    "SELECT %s FROM \"%s\" ORDER BY RANDOM() LIMIT %d",
+                    "SELECT %s FROM \"%s\" LIMIT %d",
                     cols, tableName, SAMPLE_ROW_LIMIT
             );
-
-            return jdbcTemplate.queryForList(sql);
+            return queryWithTimeout(sql);
         } catch (Exception e) {
             // Non-fatal — sample rows are best-effort enrichment context
             System.err.println("[DatabaseInspector] Could not fetch sample rows for '"
@@ -110,4 +362,25 @@ public class DatabaseInspector {
             return Collections.emptyList();
         }
     }
+
+    /**
+     * Runs a query in its own read-only transaction with
+     * {@code SET LOCAL statement_timeout}, so the timeout never leaks onto the
+     * pooled connection.
+     */
+    private List<Map<String, Object>> queryWithTimeout(String sql) {
+        return jdbcTemplate.execute((ConnectionCallback<List<Map<String, Object>>>) conn -> {
+            boolean autoCommit = conn.getAutoCommit();
+            conn.setAutoCommit(false);
+            try (Statement stmt = conn.createStatement()) {
+                stmt.execute("SET LOCAL statement_timeout = " + sampleTimeoutMs);
+                try (ResultSet rs = stmt.executeQuery(sql)) {
+                    return new RowMapperResultSetExtractor<>(new ColumnMapRowMapper()).extractData(rs);
+                }
+            } finally {
+                conn.rollback();
+                conn.setAutoCommit(autoCommit);
+            }
+        });
+    }
 }
@@ -0,0 +1,193 @@
+package com.curiosity.executor.service;
+
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.http.MediaType;
+import org.springframework.http.client.SimpleClientHttpRequestFactory;
+import org.springframework.scheduling.annotation.Scheduled;
+import org.springframework.stereotype.Service;
+import org.springframework.web.client.RestClient;
+
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.HashSet;
+import java.util.List;
+import java.util.Map;
+import java.util.Set;
+import java.util.TreeSet;
+import java.util.concurrent.atomic.AtomicLong;
+
+/**
+ * Watches the catalog for DDL changes and pushes the affected tables to the
+ * explorer, which re-indexes just those tables.
+ *
+ * Changes are found by polling {@link DatabaseInspector#schemaFingerprints()}
+ * (a cheap catalog-only query) and diffing against the previous poll. Changed
+ * and dropped tables accumulate until the schema has been quiet for
+ * {@code quiet-period-ms}, or {@code max-wait-ms} has passed since the first
+ * change, so a migration touching many tables produces a single push.
+ *
+ * The push runs outside the monitor lock with explicit connect and read
+ * timeouts, so a slow explorer delays the next poll but never blocks
+ * {@link #getStatus()}.
+ */
+@Service
+public class SchemaChangeMonitor {
+
+    private final DatabaseInspector databaseInspector;
+    private final RestClient restClient;
+    private final boolean enabled;
+    private final String explorerUrl;
+    private final String executorUrl;
+    private final long quietPeriodMs;
+    private final long maxWaitMs;
+    // Guards the pending sets and change timestamps shared with getStatus()
+    private final Object lock = new Object();
+
+    // Fingerprints from the last successful poll; null until the baseline is taken
+    private Map<String, String> fingerprints;
+    private final Set<String> pendingChanged = new TreeSet<>();
+    private final Set<String> pendingDropped = new TreeSet<>();
+    private long firstChangeAt;
+    private long lastChangeAt;
+
+    private final AtomicLong polls = new AtomicLong();
+    private final AtomicLong pollFailures = new AtomicLong();
+    private final AtomicLong changesDetected = new AtomicLong();
+    private final AtomicLong pushes = new AtomicLong();
+    private final AtomicLong pushFailures = new AtomicLong();
+    private volatile long lastPushAt;
+
+    public SchemaChangeMonitor(DatabaseInspector databaseInspector,
+                               @Value("${curiosity.schema-watch.enabled:true}") boolean enabled,
+                               @Value("${curiosity.schema-watch.explorer-url:http://localhost:8081}") String explorerUrl,
+                               @Value("${curiosity.schema-watch.executor-url:http://localhost:8082}") String executorUrl,
+                               @Value("${curiosity.schema-watch.quiet-period-ms:10000}") long quietPeriodMs,
+                               @Value("${curiosity.schema-watch.max-wait-ms:60000}") long maxWaitMs,
+                               @Value("${curiosity.schema-watch.connect-timeout-ms:2000}") int connectTimeoutMs,
+                               @Value("${curiosity.schema-watch.read-timeout-ms:5000}") int readTimeoutMs) {
+        this.databaseInspector = databaseInspector;
+        SimpleClientHttpRequestFactory requestFactory = new SimpleClientHttpRequestFactory();
+        requestFactory.setConnectTimeout(connectTimeoutMs);
+        requestFactory.setReadTimeout(readTimeoutMs);
+        this.restClient = RestClient.builder().requestFactory(requestFactory).build();
+        this.enabled = enabled;
+        this.explorerUrl = explorerUrl;
+        this.executorUrl = executorUrl;
+        this.quietPeriodMs = quietPeriodMs;
+        this.maxWaitMs = maxWaitMs;
+    }
+
+    // fixedDelay never overlaps runs, so poll() itself is single-threaded
+    @Scheduled(fixedDelayString = "${curiosity.schema-watch.poll-interval-ms:5000}")
+    public void poll() {
+        if (!enabled) {
+            return;
+        }
+        long now = System.currentTimeMillis();
+        Map<String, String> current;
+        try {
+            current = databaseInspector.schemaFingerprints();
+            polls.incrementAndGet();
+        } catch (Exception e) {
+            pollFailures.incrementAndGet();
+            System.err.println("[SchemaChangeMonitor] Could not read catalog fingerprints: " + e.getMessage());
+            return;
+        }
+
+        if (fingerprints == null) {
+            // First poll only establishes the baseline
+            fingerprints = current;
+            return;
+        }
+
+        Set<String> changed = new HashSet<>();
+        current.forEach((table, fingerprint) -> {
+            if (!fingerprint.equals(fingerprints.get(table))) {
+                changed.add(table);
+            }
+        });
+        Set<String> dropped = new HashSet<>(fingerprints.keySet());
+        dropped.removeAll(current.keySet());
+        fingerprints = current;
+
+        List<String> pushChanged;
+        List<String> pushDropped;
+        long detectedAt;
+        synchronized (lock) {
+            if (!changed.isEmpty() || !dropped.isEmpty()) {
+                if (pendingChanged.isEmpty() && pendingDropped.isEmpty()) {
+                    firstChangeAt = now;
+                }
+                lastChangeAt = now;
+                changesDetected.addAndGet(changed.size() + dropped.size());
+                // A table recreated within the window counts as changed, not dropped
+                pendingDropped.removeAll(changed);
+                pendingChanged.removeAll(dropped);
+                pendingChanged.addAll(changed);
+                pendingDropped.addAll(dropped);
+            }
+
+            boolean pending = !pendingChanged.isEmpty() || !pendingDropped.isEmpty();
+            if (!pending || (now - lastChangeAt < quietPeriodMs && now - firstChangeAt < maxWaitMs)) {
+                return;
+            }
+            pushChanged = new ArrayList<>(pendingChanged);
+            pushDropped = new ArrayList<>(pendingDropped);
+            detectedAt = firstChangeAt;
+        }
+
+        if (push(pushChanged, pushDropped, detectedAt)) {
+            synchronized (lock) {
+                pendingChanged.removeAll(pushChanged);
+                pendingDropped.removeAll(pushDropped);
+            }
+        }
+    }
+
+    /**
+     * Sends changed and dropped tables to the explorer. Returns false on
+     * failure, in which case they stay pending and are retried on the next poll.
+     */
+    private boolean push(List<String> changed, List<String> dropped, long detectedAt) {
+        Map<String, Object> body = new HashMap<>();
+        body.put("tables", changed);
+        body.put("dropped", dropped);
+        body.put("detected_at", detectedAt);
+        body.put("executor_url", executorUrl);
+        try {
+            restClient.post()
+                    .uri(explorerUrl + "/ingestion/reindex_tables")
+                    .contentType(MediaType.APPLICATION_JSON)
+                    .body(body)
+                    .retrieve()
+                    .toBodilessEntity();
+        } catch (Exception e) {
+            pushFailures.incrementAndGet();
+            System.err.println("[SchemaChangeMonitor] Could not notify explorer: " + e.getMessage());
+            return false;
+        }
+        System.out.println("[SchemaChangeMonitor] Pushed changed=" + changed + " dropped=" + dropped);
+        pushes.incrementAndGet();
+        lastPushAt = System.currentTimeMillis();
+        return true;
+    }
+
+    public Map<String, Object> getStatus() {
+        Map<String, Object> status = new HashMap<>();
+        status.put("enabled", enabled);
+        status.put("polls", polls.get());
+        status.put("poll_failures", pollFailures.get());
+        status.put("changes_detected", changesDetected.get());
+        status.put("pushes", pushes.get());
+        status.put("push_failures", pushFailures.get());
+        status.put("last_push_at", lastPushAt);
+        synchronized (lock) {
+            status.put("pending_tables", new ArrayList<>(pendingChanged));
+            status.put("pending_dropped", new ArrayList<>(pendingDropped));
+            boolean pending = !pendingChanged.isEmpty() || !pendingDropped.isEmpty();
+            // How long detected changes have been waiting to reach the explorer
+            status.put("pending_ms", pending ? System.currentTimeMillis() - firstChangeAt : 0);
+        }
+        return status;
+    }
+}
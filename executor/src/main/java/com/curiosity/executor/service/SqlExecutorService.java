@@ -1,17 +1,40 @@
 package com.curiosity.executor.service;
 
+import com.fasterxml.jackson.core.JsonProcessingException;
+import com.fasterxml.jackson.databind.JsonNode;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import org.springframework.dao.DataAccessException;
+import org.springframework.dao.QueryTimeoutException;
+import org.springframework.jdbc.core.ColumnMapRowMapper;
 import org.springframework.jdbc.core.JdbcTemplate;
 import org.springframework.stereotype.Service;
 import org.springframework.transaction.annotation.Transactional;
 
+import java.sql.PreparedStatement;
+import java.sql.SQLException;
+import java.sql.Statement;
+import java.util.HashMap;
 import java.util.List;
 import java.util.Map;
+import java.util.Set;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.atomic.AtomicLong;
 import java.util.regex.Pattern;
 
 @Service
 public class SqlExecutorService {
 
     private final JdbcTemplate jdbcTemplate;
+    private final ObjectMapper objectMapper = new ObjectMapper();
+    // PostgreSQL SQLSTATE for a statement stopped by statement_timeout or a cancel request
+    private static final String QUERY_CANCELED_STATE = "57014";
+
+    // Statements currently executing, keyed by the caller's request id, so they can be cancelled
+    private final Map<String, Statement> runningStatements = new ConcurrentHashMap<>();
+    private final Set<String> cancelRequested = ConcurrentHashMap.newKeySet();
+    private final AtomicLong timeouts = new AtomicLong();
+    private final AtomicLong cancellations = new AtomicLong();
+
     private static final Pattern DANGEROUS_KEYWORDS = Pattern.compile(
             "(?i)\\b(DROP|ALTER|INSERT|UPDATE|DELETE|TRUNCATE|GRANT|REVOKE)\\b"
     );
@@ -22,10 +45,111 @@ public class SqlExecutorService {
 
     @Transactional(readOnly = true)
     public List<Map<String, Object>> executeQuery(String sql) {
+        return executeQuery(sql, null, null);
+    }
+
+    /**
+     * Executes a read-only query, optionally bounded by a timeout and
+     * cancellable through {@link #cancelQuery(String)}.
+     *
+     * @param requestId caller-supplied id used to cancel the statement, or null
+     * @param timeoutMs remaining time budget, applied as {@code SET LOCAL statement_timeout}, or null
+     * @throws QueryTimeoutException if the budget is exhausted or the statement is cancelled
+     */
+    @Transactional(readOnly = true)
+    public List<Map<String, Object>> executeQuery(String sql, String requestId, Long timeoutMs) {
         if (isDangerous(sql)) {
             throw new SecurityException("Only READ-ONLY queries are allowed. Dangerous keywords detected.");
         }
-        return jdbcTemplate.queryForList(sql);
+        if (timeoutMs != null) {
+            if (timeoutMs <= 0) {
+                timeouts.incrementAndGet();
+                throw new QueryTimeoutException("Request deadline already expired");
+            }
+            // Scoped to this transaction, so it never leaks onto the pooled connection
+            jdbcTemplate.execute("SET LOCAL statement_timeout = " + timeoutMs);
+        }
+        try {
+            return jdbcTemplate.query(con -> {
+                PreparedStatement ps = con.prepareStatement(sql);
+                if (requestId != null) {
+                    runningStatements.put(requestId, ps);
+                }
+                return ps;
+            }, new ColumnMapRowMapper());
+        } catch (DataAccessException e) {
+            if (!isQueryCanceled(e)) {
+                throw e;
+            }
+            if (requestId != null && cancelRequested.contains(requestId)) {
+                cancellations.incrementAndGet();
+                throw new QueryTimeoutException("Query cancelled by client", e);
+            }
+            timeouts.incrementAndGet();
+            throw new QueryTimeoutException("Query exceeded its deadline", e);
+        } finally {
+            if (requestId != null) {
+                runningStatements.remove(requestId);
+                cancelRequested.remove(requestId);
+            }
+        }
+    }
+
+    /**
+     * Cancels the running statement started with the given request id.
+     *
+     * @return true if a running statement was found and a cancel was sent
+     */
+    public boolean cancelQuery(String requestId) {
+        Statement statement = runningStatements.get(requestId);
+        if (statement == null) {
+            return false;
+        }
+        cancelRequested.add(requestId);
+        try {
+            statement.cancel();
+            return true;
+        } catch (SQLException e) {
+            System.err.println("[SqlExecutorService] Could not cancel query '" + requestId + "': " + e.getMessage());
+            return false;
+        }
+    }
+
+    public Map<String, Object> getMetrics() {
+        Map<String, Object> metrics = new HashMap<>();
+        metrics.put("queries_timed_out", timeouts.get());
+        metrics.put("queries_cancelled", cancellations.get());
+        metrics.put("queries_running", runningStatements.size());
+        return metrics;
+    }
+
+    /**
+     * Plans the query without running it and returns the planner's estimates
+     * for the root node: {@code total_cost}, {@code plan_rows} and {@code node_type}.
+     */
+    @Transactional(readOnly = true)
+    public Map<String, Object> explainQuery(String sql) throws JsonProcessingException {
+        if (isDangerous(sql)) {
+            throw new SecurityException("Only READ-ONLY queries are allowed. Dangerous keywords detected.");
+        }
+        String json = jdbcTemplate.queryForObject("EXPLAIN (FORMAT JSON) " + sql, String.class);
+        JsonNode plan = objectMapper.readTree(json).get(0).get("Plan");
+
+        Map<String, Object> result = new HashMap<>();
+        result.put("total_cost", plan.get("Total Cost").asDouble());
+        result.put("plan_rows", plan.get("Plan Rows").asLong());
+        result.put("node_type", plan.get("Node Type").asText());
+        return result;
+    }
+
+    private boolean isQueryCanceled(Throwable e) {
+        for (Throwable t = e; t != null; t = t.getCause()) {
+            if (t instanceof SQLException sqlException
+                    && QUERY_CANCELED_STATE.equals(sqlException.getSQLState())) {
+                return true;
+            }
+        }
+        return false;
     }
 
     private boolean isDangerous(String sql) {
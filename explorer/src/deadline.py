@@ -0,0 +1,32 @@
+import time
+from typing import Dict, Optional
+from fastapi import HTTPException, Request
+
+# Absolute deadline (epoch milliseconds) set by the orchestrator for the whole question
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# Requests rejected or abandoned because their deadline ran out
+METRICS: Dict[str, int] = {"deadline_exceeded": 0}
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    """
+    FastAPI dependency returning the caller's deadline (epoch seconds), or None
+    if the caller did not send one. Answers 504 if it has already passed.
+    """
+    raw = request.headers.get(DEADLINE_HEADER)
+    if not raw:
+        return None
+    try:
+        deadline = int(raw) / 1000
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {DEADLINE_HEADER} header")
+    ensure_time_left(deadline)
+    return deadline
+
+
+def ensure_time_left(deadline: Optional[float]):
+    """Raise a 504 if the deadline has passed."""
+    if deadline is not None and time.time() >= deadline:
+        METRICS["deadline_exceeded"] += 1
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
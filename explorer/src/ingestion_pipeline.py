@@ -1,12 +1,19 @@
 import os
+import re
 import json
+import time
+import asyncio
 import weaviate
 import weaviate.classes.config as wvc
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import httpx
 import uuid
 from openai import AsyncOpenAI
 
+# Failed targeted re-indexes are retried after this delay, doubling up to the maximum
+REINDEX_RETRY_SECONDS = float(os.getenv("REINDEX_RETRY_SECONDS", "30"))
+REINDEX_RETRY_MAX_SECONDS = float(os.getenv("REINDEX_RETRY_MAX_SECONDS", "600"))
+
 
 class IngestionPipeline:
     def __init__(self, use_openai: bool = False):
@@ -21,6 +28,23 @@ class IngestionPipeline:
         openai_api_key = os.getenv("OPENAI_API_KEY")
         self.llm_client = AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
 
+        # Index freshness: tables reported changed by the executor and not yet
+        # re-indexed, keyed by name with the time (epoch seconds) the change was detected
+        self._pending: Dict[str, float] = {}
+        self._index_lock = asyncio.Lock()
+        # Tables from failed re-indexes, folded into the next attempt or retried in the background
+        self._retry_changed: Set[str] = set()
+        self._retry_dropped: Set[str] = set()
+        self._retry_task: Optional[asyncio.Task] = None
+        self.freshness: Dict[str, Any] = {
+            "last_change_detected_at": None,
+            "last_indexed_at": None,
+            "last_reindex_lag_seconds": None,
+            "tables_reindexed": 0,
+            "tables_deleted": 0,
+            "reindex_failures": 0,
+        }
+
     # ------------------------------------------------------------------
     # LLM Enrichment
     # ------------------------------------------------------------------
@@ -45,8 +69,9 @@ class IngestionPipeline:
         columns: List[Dict[str, Any]] = table.get("columns", [])
         foreign_keys: List[Dict[str, Any]] = table.get("foreign_keys", [])
 
-        # --- Sample rows provided by the executor service ---
+        # --- Sample rows and planner statistics provided by the executor service ---
         sample_rows: List[Dict[str, Any]] = table.get("sample_rows", [])
+        stats: Dict[str, Any] = table.get("stats") or {}
 
         # --- Build column details string ---
         col_lines = []
@@ -79,6 +104,9 @@ class IngestionPipeline:
         else:
             sample_section = "(no sample rows available)"
 
+        # --- Build planner-statistics string (pg_class / pg_stats) ---
+        stats_section = self._format_stats(stats)
+
         # --- Fallback: no LLM available ---
         if not self.llm_client:
             col_names = ", ".join(c["name"] for c in columns)
@@ -100,14 +128,14 @@ class IngestionPipeline:
         system_prompt = (
             "You are a database documentation expert. "
             "Given a database table's DDL, column definitions, foreign-key relationships, "
-            "and a small set of example rows, produce a concise but information-rich "
+            "a small set of example rows and the database planner's statistics, produce a concise but information-rich "
             "description of the table. Your description MUST include:\n"
             "1. **Purpose**: What real-world entity or concept this table represents and "
             "its role in the overall system (infer from names, types, and sample data).\n"
             "2. **Key columns**: A brief semantic explanation of the most important columns "
             "(especially PKs, FKs, status/type enums, timestamps).\n"
-            "3. **Data patterns**: Any patterns you observe from the example rows "
-            "(e.g. value ranges, enum values, date ranges, null frequency).\n"
+            "3. **Data patterns**: Any patterns you observe from the example rows and statistics "
+            "(e.g. table size, value ranges, enum values, date ranges, null frequency).\n"
             "4. **Relationships**: How this table links to others via foreign keys and what "
             "those relationships mean in business terms.\n"
             "5. **Query guidance**: Practical tips for an SQL analyst—typical join paths, "
@@ -121,6 +149,7 @@ class IngestionPipeline:
             f"Columns:\n{col_section}\n\n"
             f"Foreign keys:\n{fk_section}\n\n"
             f"Example rows (up to 5):\n{sample_section}\n\n"
+            f"Planner statistics:\n{stats_section}\n\n"
             "Write the table description now."
         )
 
@@ -145,13 +174,68 @@ class IngestionPipeline:
                 f"Foreign keys: {', '.join(fk_lines) or 'none'}."
             )
 
+    @staticmethod
+    def _format_stats(stats: Dict[str, Any]) -> str:
+        """Render executor planner statistics as compact prompt lines."""
+        if not stats:
+            return "  (no statistics available)"
+
+        row_estimate = stats.get("row_estimate", -1)
+        lines = [
+            f"  - estimated rows: {row_estimate}"
+            if row_estimate is not None and row_estimate >= 0
+            else "  - estimated rows: unknown (table not analyzed)"
+        ]
+        for col_name, col_stats in (stats.get("columns") or {}).items():
+            n_distinct = col_stats.get("n_distinct")
+            # Negative n_distinct is a fraction of the row count (e.g. -1 = unique)
+            if n_distinct is not None and n_distinct < 0:
+                distinct_str = f"{-n_distinct:.0%} of rows distinct"
+            else:
+                distinct_str = f"~{n_distinct:g} distinct" if n_distinct is not None else "distinct unknown"
+            parts = [distinct_str, f"{col_stats.get('null_frac', 0):.0%} null"]
+            if col_stats.get("most_common_vals"):
+                parts.append(f"common values {col_stats['most_common_vals'][:200]}")
+            lines.append(f"  - {col_name}: {', '.join(parts)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _column_profiles(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Merge column definitions with their pg_stats figures into compact profiles."""
+        column_stats = (table.get("stats") or {}).get("columns") or {}
+        profiles = []
+        for col in table.get("columns", []):
+            col_stats = column_stats.get(col["name"], {})
+            profiles.append({
+                "name": col["name"],
+                "type": col["type"],
+                "primaryKey": bool(col.get("primaryKey")),
+                "unique": bool(col.get("unique")),
+                "n_distinct": col_stats.get("n_distinct"),
+                "null_frac": col_stats.get("null_frac"),
+                "most_common_vals": IngestionPipeline._parse_pg_array(col_stats.get("most_common_vals")),
+            })
+        return profiles
+
+    @staticmethod
+    def _parse_pg_array(text: Optional[str]) -> List[str]:
+        """Parse a one-dimensional Postgres array literal such as {a,"b c"} into strings."""
+        if not text or not text.startswith("{") or not text.endswith("}"):
+            return []
+        items = re.findall(r'"((?:[^"\\]|\\.)*)"|([^,]+)', text[1:-1])
+        return [
+            re.sub(r"\\(.)", r"\1", quoted) if quoted else bare
+            for quoted, bare in items
+        ]
+
     # ------------------------------------------------------------------
     # Schema fetch & collection management
     # ------------------------------------------------------------------
 
-    async def fetch_schema_from_executor(self, executor_url: str):
+    async def fetch_schema_from_executor(self, executor_url: str, tables: Optional[List[str]] = None):
+        payload = {"tables": tables} if tables is not None else {}
         async with httpx.AsyncClient() as client:
-            response = await client.post(f"{executor_url}/mcp/refresh_schema_metadata", json={})
+            response = await client.post(f"{executor_url}/mcp/refresh_schema_metadata", json=payload)
             response.raise_for_status()
             return response.json()
 
@@ -175,6 +259,12 @@ class IngestionPipeline:
                 wvc.Property(name="description", data_type=wvc.DataType.TEXT),
                 wvc.Property(name="ddl_minimal", data_type=wvc.DataType.TEXT),
                 wvc.Property(name="ddl_raw", data_type=wvc.DataType.TEXT),
+                # Physical-design hints for the SQL generator (not searched on)
+                wvc.Property(name="row_estimate", data_type=wvc.DataType.INT, skip_vectorization=True),
+                wvc.Property(name="indexes", data_type=wvc.DataType.TEXT, skip_vectorization=True),
+                wvc.Property(name="partitioning", data_type=wvc.DataType.TEXT, skip_vectorization=True),
+                # JSON column profiles (type, key flags, distinct/common values) for the template fast path
+                wvc.Property(name="columns_json", data_type=wvc.DataType.TEXT, skip_vectorization=True),
             ],
             references=[
                 wvc.ReferenceProperty(name="relatedTables", target_collection=self.collection_name)
@@ -182,89 +272,253 @@ class IngestionPipeline:
         )
 
     # ------------------------------------------------------------------
-    # Main pipeline
+    # Table objects
     # ------------------------------------------------------------------
 
-    async def run(self, executor_url: str = "http://localhost:8082"):
-        if not self.client:
-            return {"status": "error", "message": "Weaviate not connected"}
-
-        # 1. Fetch raw schema from Java Executor
-        try:
-            raw_schema = await self.fetch_schema_from_executor(executor_url)
-        except Exception as e:
-            return {"status": "error", "message": f"Failed to fetch schema from executor: {e}"}
-
-        # 2. Reset Collection
-        try:
-            self.create_collection()
-        except Exception as e:
-            return {"status": "error", "message": f"Failed to create collection: {e}"}
-
-        collection = self.client.collections.get(self.collection_name)
+    @staticmethod
+    def _table_uuid(table_name: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_DNS, table_name))
 
-        # 3. Enrich and Insert Tables
-        with collection.batch.dynamic() as batch:
-            for table in raw_schema:
-                table_uuid = str(uuid.uuid5(uuid.NAMESPACE_DNS, table["name"]))
-
-                # Build DDL strings
-                columns = table.get("columns", [])
-                col_str = ", ".join(
-                    [f"{c['name']} {c['type']}" for c in columns]
-                )
-                ddl_minimal = f"TABLE {table['name']} ({col_str})"
-
-                # Full DDL with constraints
-                col_full_lines = []
-                for c in columns:
-                    parts = [c["name"], c["type"]]
-                    if c.get("primaryKey"):
-                        parts.append("PRIMARY KEY")
-                    if c.get("notNull") or c.get("nullable") is False:
-                        parts.append("NOT NULL")
-                    col_full_lines.append("  " + " ".join(parts))
-                fks = table.get("foreign_keys", [])
-                for fk in fks:
-                    col_full_lines.append(
-                        f"  FOREIGN KEY ({fk.get('column')}) "
-                        f"REFERENCES {fk.get('target_table')}({fk.get('target_column', 'id')})"
-                    )
-                ddl_raw = (
-                    f"CREATE TABLE {table['name']} (\n"
-                    + ",\n".join(col_full_lines)
-                    + "\n);"
-                )
-
-                # LLM-enriched description (sample_rows come from executor)
-                description = await self._enrich_table_description(
-                    table=table,
-                    ddl_raw=ddl_raw,
-                )
+    async def _table_properties(self, table: Dict[str, Any]) -> Dict[str, Any]:
+        """Build DDL strings and physical-design summaries and enrich the description."""
+        # Build DDL strings
+        columns = table.get("columns", [])
+        col_str = ", ".join(
+            [f"{c['name']} {c['type']}" for c in columns]
+        )
+        ddl_minimal = f"TABLE {table['name']} ({col_str})"
+
+        # Full DDL with constraints
+        col_full_lines = []
+        for c in columns:
+            parts = [c["name"], c["type"]]
+            if c.get("primaryKey"):
+                parts.append("PRIMARY KEY")
+            if c.get("notNull") or c.get("nullable") is False:
+                parts.append("NOT NULL")
+            if c.get("unique"):
+                parts.append("UNIQUE")
+            col_full_lines.append("  " + " ".join(parts))
+        fks = table.get("foreign_keys", [])
+        for fk in fks:
+            col_full_lines.append(
+                f"  FOREIGN KEY ({fk.get('column')}) "
+                f"REFERENCES {fk.get('target_table')}({fk.get('target_column', 'id')})"
+            )
+        ddl_raw = (
+            f"CREATE TABLE {table['name']} (\n"
+            + ",\n".join(col_full_lines)
+            + "\n);"
+        )
+        indexes = table.get("indexes", [])
+        index_defs = [idx["definition"] for idx in indexes if idx.get("definition")]
+        if index_defs:
+            ddl_raw += "\n" + "\n".join(f"{d};" for d in index_defs)
+
+        # Compact physical-design summary (row count, indexes, partitioning)
+        row_estimate = (table.get("stats") or {}).get("row_estimate", -1)
+        index_summary = "; ".join(
+            f"{idx.get('name')}({', '.join(idx.get('columns', []))})"
+            + (" PK" if idx.get("primary") else " UNIQUE" if idx.get("unique") else "")
+            for idx in indexes
+        )
+        partitioning = table.get("partitioning")
+        partition_summary = (
+            f"{partitioning.get('key')} ({partitioning.get('partitions', 0)} partitions)"
+            if partitioning
+            else ""
+        )
 
-                batch.add_object(
-                    properties={
-                        "name": table["name"],
-                        "description": description,
-                        "ddl_minimal": ddl_minimal,
-                        "ddl_raw": ddl_raw,
-                    },
-                    uuid=table_uuid,
-                )
+        # LLM-enriched description (sample_rows come from executor)
+        description = await self._enrich_table_description(
+            table=table,
+            ddl_raw=ddl_raw,
+        )
 
-        # 4. Add References (Foreign Keys)
+        return {
+            "name": table["name"],
+            "description": description,
+            "ddl_minimal": ddl_minimal,
+            "ddl_raw": ddl_raw,
+            "row_estimate": row_estimate,
+            "indexes": index_summary,
+            "partitioning": partition_summary,
+            "columns_json": json.dumps(self._column_profiles(table)),
+        }
+
+    def _add_references(self, collection, tables: List[Dict[str, Any]]):
+        """Link each table to the tables its foreign keys point at."""
         with collection.batch.dynamic() as batch:
-            for table in raw_schema:
-                source_uuid = str(uuid.uuid5(uuid.NAMESPACE_DNS, table["name"]))
+            for table in tables:
+                source_uuid = self._table_uuid(table["name"])
                 fks = table.get("foreign_keys", [])
                 for fk in fks:
                     target_table = fk.get("target_table")
                     if target_table:
-                        target_uuid = str(uuid.uuid5(uuid.NAMESPACE_DNS, target_table))
                         batch.add_reference(
                             from_uuid=source_uuid,
                             from_property="relatedTables",
-                            to=target_uuid,
+                            to=self._table_uuid(target_table),
                         )
 
-        return {"status": "success", "tables_ingested": len(raw_schema)}
+    # ------------------------------------------------------------------
+    # Index freshness
+    # ------------------------------------------------------------------
+
+    def mark_pending(self, tables: List[str], detected_at: Optional[float] = None):
+        """Record tables reported changed; the earliest unindexed detection time is kept."""
+        detected_at = detected_at or time.time()
+        for name in tables:
+            self._pending.setdefault(name, detected_at)
+        last = self.freshness["last_change_detected_at"]
+        self.freshness["last_change_detected_at"] = max(last or 0.0, detected_at)
+
+    def _mark_indexed(self, snapshot: Dict[str, float]):
+        """Clear pending entries captured in snapshot unless a newer change arrived meanwhile."""
+        now = time.time()
+        for name, detected_at in snapshot.items():
+            if self._pending.get(name) == detected_at:
+                del self._pending[name]
+        if snapshot:
+            self.freshness["last_reindex_lag_seconds"] = now - min(snapshot.values())
+        self.freshness["last_indexed_at"] = now
+
+    def index_status(self) -> Dict[str, Any]:
+        """How far the index is behind the database: age of the oldest unindexed change."""
+        oldest = min(self._pending.values()) if self._pending else None
+        return {
+            **self.freshness,
+            "pending_tables": sorted(self._pending),
+            "retry_tables": sorted(self._retry_changed | self._retry_dropped),
+            "lag_seconds": time.time() - oldest if oldest else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Main pipeline
+    # ------------------------------------------------------------------
+
+    async def run(self, executor_url: str = "http://localhost:8082"):
+        if not self.client:
+            return {"status": "error", "message": "Weaviate not connected"}
+
+        async with self._index_lock:
+            # Changes reported before this point are covered by the full re-index
+            snapshot = dict(self._pending)
+
+            # 1. Fetch raw schema from Java Executor
+            try:
+                raw_schema = await self.fetch_schema_from_executor(executor_url)
+            except Exception as e:
+                return {"status": "error", "message": f"Failed to fetch schema from executor: {e}"}
+
+            # 2. Reset Collection
+            try:
+                self.create_collection()
+            except Exception as e:
+                return {"status": "error", "message": f"Failed to create collection: {e}"}
+
+            collection = self.client.collections.get(self.collection_name)
+
+            # 3. Enrich and Insert Tables
+            with collection.batch.dynamic() as batch:
+                for table in raw_schema:
+                    batch.add_object(
+                        properties=await self._table_properties(table),
+                        uuid=self._table_uuid(table["name"]),
+                    )
+
+            # 4. Add References (Foreign Keys)
+            self._add_references(collection, raw_schema)
+
+            self._mark_indexed(snapshot)
+            self._retry_changed -= snapshot.keys()
+            self._retry_dropped -= snapshot.keys()
+            return {"status": "success", "tables_ingested": len(raw_schema)}
+
+    async def reindex_tables(
+        self,
+        tables: List[str],
+        dropped: List[str],
+        executor_url: str = "http://localhost:8082",
+    ):
+        """
+        Re-extract, re-enrich and upsert only the given tables and delete the
+        dropped ones, leaving the rest of the index untouched. Objects keep
+        their name-derived UUIDs, so references from unchanged tables stay
+        valid. Falls back to a full run when the collection does not exist.
+
+        Tables from earlier failed attempts are included. If this attempt
+        fails, its tables stay pending and a background retry is scheduled,
+        since the executor considers them delivered once it has pushed them.
+        """
+        if not self.client:
+            return {"status": "error", "message": "Weaviate not connected"}
+
+        # A table recreated after a failed drop is a change, and vice versa
+        changed = (self._retry_changed - set(dropped)) | set(tables)
+        gone = (self._retry_dropped - set(tables)) | set(dropped)
+        self._retry_changed, self._retry_dropped = set(), set()
+
+        try:
+            if not self.client.collections.exists(self.collection_name):
+                result = await self.run(executor_url)
+            else:
+                result = await self._reindex(sorted(changed), sorted(gone), executor_url)
+        except Exception as e:
+            result = {"status": "error", "message": f"Re-index failed: {e}"}
+
+        if result.get("status") != "success":
+            self.freshness["reindex_failures"] += 1
+            self._retry_changed |= changed
+            self._retry_dropped |= gone
+            if self._retry_task is None:
+                self._retry_task = asyncio.create_task(self._retry_failed(executor_url))
+            print(f"[Ingestion] Re-index failed, will retry: {result.get('message')}")
+        return result
+
+    async def _retry_failed(self, executor_url: str):
+        delay = REINDEX_RETRY_SECONDS
+        try:
+            while self._retry_changed or self._retry_dropped:
+                await asyncio.sleep(delay)
+                result = await self.reindex_tables([], [], executor_url)
+                if result.get("status") == "success":
+                    break
+                delay = min(delay * 2, REINDEX_RETRY_MAX_SECONDS)
+        finally:
+            self._retry_task = None
+
+    async def _reindex(self, tables: List[str], dropped: List[str], executor_url: str):
+        async with self._index_lock:
+            snapshot = {
+                name: self._pending[name] for name in set(tables) | set(dropped) if name in self._pending
+            }
+
+            try:
+                raw_schema = await self.fetch_schema_from_executor(executor_url, tables) if tables else []
+            except Exception as e:
+                return {"status": "error", "message": f"Failed to fetch schema from executor: {e}"}
+
+            # Tables reported as changed but no longer present were dropped since
+            found = {table["name"] for table in raw_schema}
+            gone = set(dropped) | (set(tables) - found)
+
+            try:
+                collection = self.client.collections.get(self.collection_name)
+                for name in gone:
+                    collection.data.delete_by_id(self._table_uuid(name))
+
+                objects = [(table, await self._table_properties(table)) for table in raw_schema]
+                # Inserting with an existing UUID replaces the object, dropping its references
+                with collection.batch.dynamic() as batch:
+                    for table, properties in objects:
+                        batch.add_object(properties=properties, uuid=self._table_uuid(table["name"]))
+                self._add_references(collection, raw_schema)
+            except Exception as e:
+                return {"status": "error", "message": f"Failed to update index: {e}"}
+
+            self.freshness["tables_reindexed"] += len(raw_schema)
+            self.freshness["tables_deleted"] += len(gone)
+            self._mark_indexed(snapshot)
+            print(f"[Ingestion] Re-indexed {sorted(found)}, deleted {sorted(gone)}")
+            return {"status": "success", "tables_reindexed": len(raw_schema), "tables_deleted": len(gone)}
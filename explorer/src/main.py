@@ -1,11 +1,15 @@
+import os
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from src.schema_explorer import SchemaExplorer
+from src.ingestion_pipeline import IngestionPipeline
+from src.deadline import request_deadline, ensure_time_left, METRICS
 
 app = FastAPI(title="Schema Explorer Service")
 explorer = SchemaExplorer()
+pipeline = IngestionPipeline()
 
 class SearchRequest(BaseModel):
     query: str
@@ -18,53 +22,121 @@ class TableDDLRequest(BaseModel):
 class NeighborRequest(BaseModel):
     table_name: str
 
+class TableStatsRequest(BaseModel):
+    table_names: List[str]
+
 class ColumnSampleRequest(BaseModel):
     table_name: str
     column_name: str
 
+class IngestionRequest(BaseModel):
+    executor_url: str = os.getenv("EXECUTOR_URL", "http://localhost:8082")
+
+class ReindexTablesRequest(BaseModel):
+    tables: List[str] = []
+    dropped: List[str] = []
+    # Epoch milliseconds at which the executor first saw the change
+    detected_at: Optional[int] = None
+    executor_url: str = "http://localhost:8082"
+
 @app.get("/")
 async def root():
     return {"status": "Schema Explorer Service is Running"}
 
 @app.post("/tools/search_schema_index")
-async def search_schema_index(request: SearchRequest):
+async def search_schema_index(request: SearchRequest, deadline: Optional[float] = Depends(request_deadline)):
     try:
         results = explorer.search_schema(request.query, request.limit)
+        ensure_time_left(deadline)
         return results
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tools/get_table_ddl")
-async def get_table_ddl(request: TableDDLRequest):
+async def get_table_ddl(request: TableDDLRequest, deadline: Optional[float] = Depends(request_deadline)):
     try:
         results = explorer.get_table_ddl(request.table_names, request.minimal)
+        ensure_time_left(deadline)
         return results
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tools/get_table_neighbors")
-async def get_table_neighbors(request: NeighborRequest):
+async def get_table_neighbors(request: NeighborRequest, deadline: Optional[float] = Depends(request_deadline)):
     try:
         results = explorer.get_table_neighbors(request.table_name)
+        ensure_time_left(deadline)
+        return results
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/tools/get_table_stats")
+async def get_table_stats(request: TableStatsRequest, deadline: Optional[float] = Depends(request_deadline)):
+    try:
+        results = explorer.get_table_stats(request.table_names)
+        ensure_time_left(deadline)
+        return results
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/tools/get_schema_catalog")
+async def get_schema_catalog(deadline: Optional[float] = Depends(request_deadline)):
+    try:
+        results = explorer.get_schema_catalog()
+        ensure_time_left(deadline)
         return results
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tools/get_column_samples")
-async def get_column_samples(request: ColumnSampleRequest):
+async def get_column_samples(request: ColumnSampleRequest, deadline: Optional[float] = Depends(request_deadline)):
     try:
-        results = await explorer.get_column_samples(request.table_name, request.column_name)
+        results = await explorer.get_column_samples(request.table_name, request.column_name, deadline)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tools/sync_schema")
 async def sync_schema():
+    # Full rebuild through the ingestion pipeline, so objects keep the name-derived
+    # UUIDs and physical/column properties that targeted re-indexing relies on
     try:
-        results = await explorer.sync_schema()
-        return results
+        return await pipeline.run(os.getenv("EXECUTOR_URL", "http://localhost:8082"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/ingestion/trigger")
+async def trigger_ingestion(request: IngestionRequest):
+    try:
+        return await pipeline.run(request.executor_url)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/ingestion/reindex_tables")
+async def reindex_tables(request: ReindexTablesRequest, background_tasks: BackgroundTasks):
+    # Pushed by the executor's schema watcher; enrichment runs after the response
+    detected_at = request.detected_at / 1000 if request.detected_at else None
+    pipeline.mark_pending(request.tables + request.dropped, detected_at)
+    background_tasks.add_task(pipeline.reindex_tables, request.tables, request.dropped, request.executor_url)
+    return {"status": "accepted", "tables": len(request.tables), "dropped": len(request.dropped)}
+
+@app.get("/ingestion/status")
+async def ingestion_status():
+    return pipeline.index_status()
+
+@app.get("/metrics")
+async def metrics():
+    return METRICS
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8081)
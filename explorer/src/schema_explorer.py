@@ -1,9 +1,11 @@
 import os
+import json
+import time
 import weaviate
 import weaviate.classes.query as wvq
-import weaviate.classes.config as wvc
 import httpx
 from typing import List, Dict, Any, Optional
+from .deadline import DEADLINE_HEADER, METRICS
 
 class SchemaExplorer:
     def __init__(self):
@@ -108,91 +110,78 @@ class SchemaExplorer:
         
         return results
 
-    async def get_column_samples(self, table_name: str, column_name: str) -> List[Any]:
+    def get_table_stats(self, table_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves row estimates, index summaries and partitioning for specified tables.
+        """
+        if not self.client:
+            return {}
+
+        collection = self.client.collections.get(self.collection_name)
+        results = {}
+
+        for name in table_names:
+            response = collection.query.fetch_objects(
+                filters=weaviate.classes.query.Filter.by_property("name").equal(name),
+                limit=1,
+                return_properties=["row_estimate", "indexes", "partitioning"]
+            )
+            if response.objects:
+                props = response.objects[0].properties
+                results[name] = {
+                    "row_estimate": props.get("row_estimate"),
+                    "indexes": props.get("indexes") or "",
+                    "partitioning": props.get("partitioning") or "",
+                }
+
+        return results
+
+    def get_schema_catalog(self) -> List[Dict[str, Any]]:
+        """
+        Lists every indexed table with its column profiles and row estimate.
+        """
+        if not self.client:
+            return []
+
+        collection = self.client.collections.get(self.collection_name)
+        catalog = []
+        for obj in collection.iterator(return_properties=["name", "columns_json", "row_estimate"]):
+            try:
+                columns = json.loads(obj.properties.get("columns_json") or "[]")
+            except ValueError:
+                columns = []
+            catalog.append({
+                "name": obj.properties["name"],
+                "columns": columns,
+                "row_estimate": obj.properties.get("row_estimate"),
+            })
+        return catalog
+
+    async def get_column_samples(self, table_name: str, column_name: str, deadline: Optional[float] = None) -> List[Any]:
         """
         Retrieves column samples by querying the Executor Service.
+        The caller's deadline (epoch seconds) is forwarded to the executor.
         """
         executor_url = os.getenv("EXECUTOR_URL", "http://localhost:8082")
         
         sql = f"SELECT {column_name} FROM {table_name} LIMIT 5"
+
+        headers = {}
+        timeout = httpx.Timeout(float(os.getenv("EXECUTOR_TIMEOUT_SECONDS", "30")))
+        if deadline is not None:
+            headers[DEADLINE_HEADER] = str(int(deadline * 1000))
+            timeout = httpx.Timeout(max(deadline - time.time(), 0.001))
         
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=timeout) as client:
             try:
-                resp = await client.post(f"{executor_url}/mcp/execute_sql_query", json={"sql": sql})
+                resp = await client.post(f"{executor_url}/mcp/execute_sql_query", json={"sql": sql}, headers=headers)
                 resp.raise_for_status()
                 data = resp.json() 
                 return [row.get(column_name) for row in data]
+            except httpx.TimeoutException as e:
+                METRICS["deadline_exceeded"] += 1
+                print(f"Timed out fetching samples: {e}")
+                return []
             except Exception as e:
                 print(f"Error fetching samples: {e}")
                 return []
-
-    async def sync_schema(self) -> Dict[str, Any]:
-        """
-        Fetches schema from Executor Service and indexes it into Weaviate.
-        """
-        executor_url = os.getenv("EXECUTOR_URL", "http://localhost:8082")
-        
-        # 1. Fetch Schema
-        try:
-             async with httpx.AsyncClient() as client:
-                resp = await client.get(f"{executor_url}/inspect_schema")
-                resp.raise_for_status()
-                schema_data = resp.json() # List[Map]
-        except Exception as e:
-             return {"status": "error", "message": f"Failed to fetch schema from Executor: {str(e)}"}
-             
-        if not self.client:
-             return {"status": "error", "message": "Weaviate client not connected"}
-             
-        # 2. Re-create Collection
-        try:
-            if self.client.collections.exists(self.collection_name):
-                self.client.collections.delete(self.collection_name)
-                
-            self.client.collections.create(
-                name=self.collection_name,
-                properties=[
-                    wvc.Property(name="name", data_type=wvc.DataType.TEXT),
-                    wvc.Property(name="description", data_type=wvc.DataType.TEXT),
-                    wvc.Property(name="ddl_minimal", data_type=wvc.DataType.TEXT), 
-                    wvc.Property(name="ddl_raw", data_type=wvc.DataType.TEXT), 
-                ],
-                vectorizer_config=wvc.Configure.Vectorizer.text2vec_openai(),
-                generative_config=wvc.Configure.Generative.openai()
-            )
-        except Exception as e:
-             return {"status": "error", "message": f"Failed to create Weaviate collection: {str(e)}"}
-
-        # 3. Index Tables
-        collection = self.client.collections.get(self.collection_name)
-        indexed_count = 0
-        
-        for table in schema_data:
-             table_name = table.get("name")
-             columns = table.get("columns", [])
-             
-             # Construct DDL
-             ddl_minimal = self._construct_ddl(table_name, columns, minimal=True)
-             ddl_raw = self._construct_ddl(table_name, columns, minimal=False)
-             
-             # Insert
-             collection.data.insert(
-                 properties={
-                     "name": table_name,
-                     "description": f"Table {table_name} with columns: " + ", ".join([c['name'] for c in columns]),
-                     "ddl_minimal": ddl_minimal,
-                     "ddl_raw": ddl_raw
-                 }
-             )
-             indexed_count += 1
-             
-        return {"status": "success", "indexed_tables": indexed_count}
-
-    def _construct_ddl(self, table_name: str, columns: List[Dict[str, str]], minimal: bool) -> str:
-        """Helper to construct CREATE TABLE statement."""
-        lines = [f"CREATE TABLE {table_name} ("]
-        for col in columns:
-            col_def = f"  {col['name']} {col['type']}"
-            lines.append(col_def)
-        lines.append(");")
-        return "\n".join(lines)
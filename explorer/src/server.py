@@ -1,8 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from .schema_explorer import SchemaExplorer
 from .ingestion_pipeline import IngestionPipeline
+from .deadline import request_deadline, ensure_time_left, METRICS
 
 app = FastAPI()
 
@@ -21,6 +22,9 @@ class TableDDLRequest(BaseModel):
     table_names: List[str]
     minimal: bool = True
 
+class TableStatsRequest(BaseModel):
+    table_names: List[str]
+
 class ColumnSamplesRequest(BaseModel):
     table_name: str
     column_name: str
@@ -28,37 +32,68 @@ class ColumnSamplesRequest(BaseModel):
 class IngestionRequest(BaseModel):
     executor_url: str = "http://localhost:8082"
 
+class ReindexTablesRequest(BaseModel):
+    tables: List[str] = []
+    dropped: List[str] = []
+    # Epoch milliseconds at which the executor first saw the change
+    detected_at: Optional[int] = None
+    executor_url: str = "http://localhost:8082"
+
 @app.get("/")
 def read_root():
     return {"status": "Schema Explorer Service is Running"}
 
 @app.post("/tools/search_schema_index")
-def search_schema_index(request: SearchSchemaRequest):
+def search_schema_index(request: SearchSchemaRequest, deadline: Optional[float] = Depends(request_deadline)):
     """
     Search schema index (Weaviate).
     """
-    return explorer.search_schema(request.query, request.limit)
+    results = explorer.search_schema(request.query, request.limit)
+    ensure_time_left(deadline)
+    return results
 
 @app.post("/tools/get_table_neighbors")
-def get_table_neighbors(request: TableNeighborsRequest):
+def get_table_neighbors(request: TableNeighborsRequest, deadline: Optional[float] = Depends(request_deadline)):
     """
     Get table neighbors (Graph Traversal).
     """
-    return explorer.get_table_neighbors(request.table_name)
+    results = explorer.get_table_neighbors(request.table_name)
+    ensure_time_left(deadline)
+    return results
 
 @app.post("/tools/get_table_ddl")
-def get_table_ddl(request: TableDDLRequest):
+def get_table_ddl(request: TableDDLRequest, deadline: Optional[float] = Depends(request_deadline)):
     """
     Get table DDL.
     """
-    return explorer.get_table_ddl(request.table_names, request.minimal)
+    results = explorer.get_table_ddl(request.table_names, request.minimal)
+    ensure_time_left(deadline)
+    return results
+
+@app.post("/tools/get_table_stats")
+def get_table_stats(request: TableStatsRequest, deadline: Optional[float] = Depends(request_deadline)):
+    """
+    Get table row estimates, indexes and partitioning.
+    """
+    results = explorer.get_table_stats(request.table_names)
+    ensure_time_left(deadline)
+    return results
+
+@app.post("/tools/get_schema_catalog")
+def get_schema_catalog(deadline: Optional[float] = Depends(request_deadline)):
+    """
+    Get all tables with column profiles.
+    """
+    results = explorer.get_schema_catalog()
+    ensure_time_left(deadline)
+    return results
 
 @app.post("/tools/get_column_samples")
-def get_column_samples(request: ColumnSamplesRequest):
+async def get_column_samples(request: ColumnSamplesRequest, deadline: Optional[float] = Depends(request_deadline)):
     """
     Get column samples.
     """
-    return explorer.get_column_samples(request.table_name, request.column_name)
+    return await explorer.get_column_samples(request.table_name, request.column_name, deadline)
 
 @app.post("/ingestion/trigger")
 async def trigger_ingestion(request: IngestionRequest):
@@ -66,3 +101,28 @@ async def trigger_ingestion(request: IngestionRequest):
     Trigger ingestion pipeline.
     """
     return await pipeline.run(request.executor_url)
+
+@app.post("/ingestion/reindex_tables")
+async def reindex_tables(request: ReindexTablesRequest, background_tasks: BackgroundTasks):
+    """
+    Re-index only the tables the executor reported as changed or dropped.
+    Returns immediately; enrichment runs in the background.
+    """
+    detected_at = request.detected_at / 1000 if request.detected_at else None
+    pipeline.mark_pending(request.tables + request.dropped, detected_at)
+    background_tasks.add_task(pipeline.reindex_tables, request.tables, request.dropped, request.executor_url)
+    return {"status": "accepted", "tables": len(request.tables), "dropped": len(request.dropped)}
+
+@app.get("/ingestion/status")
+def ingestion_status():
+    """
+    Index freshness and lag behind the database.
+    """
+    return pipeline.index_status()
+
+@app.get("/metrics")
+def metrics():
+    """
+    Deadline counters.
+    """
+    return METRICS
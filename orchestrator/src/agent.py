@@ -1,39 +1,114 @@
 import os
+import time
 import asyncio
 from langgraph.graph import StateGraph, END
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .state import AgentState
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from .tools_client import search_schema, get_table_ddl, execute_query
+from .tools_client import (
+    search_schema, get_table_ddl, get_table_stats, explain_query, execute_query, METRICS
+)
+from .result_store import result_store
+from .fast_path import FastPath, FAST_PATH_ENABLED, MIN_CONFIDENCE, METRICS as FAST_PATH_METRICS
+from .sessions import SessionStore, new_concepts
+
+# Optional EXPLAIN gate: plans above this cost are regenerated or rejected (unset = disabled)
+MAX_PLAN_COST = float(os.getenv("SQL_MAX_PLAN_COST")) if os.getenv("SQL_MAX_PLAN_COST") else None
+MAX_REGENERATIONS = int(os.getenv("SQL_MAX_REGENERATIONS", "1"))
+
+# End-to-end budget for one question; propagated to every tool call as a deadline
+QUESTION_TIMEOUT_SECONDS = float(os.getenv("QUESTION_TIMEOUT_SECONDS", "120"))
 
 class Agent:
-    def __init__(self):
-        self.llm = ChatOpenAI(
+    def __init__(self, llm=None):
+        # Any chat model exposing `ainvoke` can be injected (e.g. an offline stand-in)
+        self.llm = llm or ChatOpenAI(
             model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o"),
             temperature=0
         )
+        self.fast_path = FastPath()
+        self.sessions = SessionStore()
         self.workflow = self._build_graph()
+        # Compiled lazily with the session checkpointer on the first session run
+        self._session_workflow = None
 
-    def _build_graph(self):
+    def _build_graph(self, checkpointer=None):
         workflow = StateGraph(AgentState)
         
+        workflow.add_node("fast_path", self.fast_path_step)
         workflow.add_node("planner", self.plan_step)
         workflow.add_node("explorer", self.explore_step)
         workflow.add_node("generator", self.generate_step)
+        workflow.add_node("cost_check", self.cost_check_step)
         workflow.add_node("executor", self.execute_step)
 
-        workflow.set_entry_point("planner")
+        workflow.set_entry_point("fast_path")
+        workflow.add_conditional_edges(
+            "fast_path",
+            self._route_after_fast_path,
+            {"planner": "planner", "executor": "executor"}
+        )
         workflow.add_edge("planner", "explorer")
         workflow.add_edge("explorer", "generator")
-        workflow.add_edge("generator", "executor")
-        workflow.add_edge("executor", END)
+        workflow.add_edge("generator", "cost_check")
+        workflow.add_conditional_edges(
+            "cost_check",
+            self._route_after_cost_check,
+            {"generator": "generator", "executor": "executor"}
+        )
+        workflow.add_conditional_edges(
+            "executor",
+            self._route_after_execute,
+            {"planner": "planner", END: END}
+        )
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+
+    async def fast_path_step(self, state: AgentState):
+        # Follow-ups refine earlier SQL, which the templates know nothing about
+        if not FAST_PATH_ENABLED or state.get("previous_sql"):
+            return {}
+
+        query = state.get('input_query')
+        match = await self.fast_path.try_match(query, deadline=state.get("deadline"))
+        if not match or match["confidence"] < MIN_CONFIDENCE:
+            confidence = match["confidence"] if match else None
+            print(f"Fast path declined (confidence: {confidence}); using LLM")
+            return {"fast_path_confidence": confidence}
+
+        print(f"Fast path matched '{match['intent']}' on {match['table']}: {match['sql']}")
+        return {
+            "sql_query": match["sql"],
+            "fast_path_intent": match["intent"],
+            "fast_path_confidence": match["confidence"],
+            "reasoning_log": [f"Fast path: {match['intent']} on '{match['table']}' "
+                              f"(confidence {match['confidence']:.2f})"]
+        }
+
+    def _route_after_fast_path(self, state: AgentState) -> str:
+        return "executor" if state.get("fast_path_intent") else "planner"
+
+    def _route_after_execute(self, state: AgentState) -> str:
+        # A failed fast-path query falls back to the LLM path once
+        if state.get("fast_path_fallback") and state.get("execution_result") is None and not state.get("error_message"):
+            return "planner"
+        return END
 
     async def plan_step(self, state: AgentState):
         query = state.get('input_query')
         print(f"Planning for query: {query}")
+
+        if state.get("previous_sql"):
+            # Follow-up: tables from earlier turns are reused, so only search for concepts they don't cover
+            terms = new_concepts(query, state.get("relevant_tables", []))
+            print(f"Follow-up; new concepts to search: {terms}")
+            return {
+                "search_query": " ".join(terms),
+                "reasoning_log": [f"Follow-up: reusing {len(state.get('relevant_tables', []))} tables, "
+                                  f"new concepts {terms}"],
+                "skipped_steps": state.get("skipped_steps", []) + ["planner_llm"]
+            }
         
         # Ask LLM to extract keywords and refine intent for search
         messages = [
@@ -51,29 +126,61 @@ class Agent:
             return {"reasoning_log": [f"Planning failed: {e}"], "search_query": query}
 
     async def explore_step(self, state: AgentState):
+        known_tables = state.get("relevant_tables", []) if state.get("previous_sql") else []
+        skipped = state.get("skipped_steps", [])
+        if known_tables and not state.get("search_query"):
+            print("Follow-up covered by known tables; skipping schema search")
+            return {"skipped_steps": skipped + ["schema_search", "ddl_fetch"]}
+
         print("Searching schema...")
         # Use refined search query if available
         query = state.get('search_query') or state.get('input_query')
         print(f"Using search query: {query}")
         
         try:
-            results = await search_schema(query, limit=5)
+            results = await search_schema(query, limit=5, deadline=state.get("deadline"))
             
             # Filter solely based on some heuristic or take top N
             # Here we take everything returned by search
             table_names = [r['table_name'] for r in results]
+
+            # DDL for tables retrieved in earlier turns is reused
+            known_names = {t["name"] for t in known_tables}
+            if known_tables:
+                table_names = [n for n in table_names if n not in known_names]
+                if not table_names:
+                    return {"skipped_steps": skipped + ["ddl_fetch"]}
             
             if not table_names:
                 return {"relevant_tables": [], "error_message": "No relevant tables found."}
 
-            ddl_map = await get_table_ddl(table_names, minimal=True)
+            ddl_map, stats_map = await asyncio.gather(
+                get_table_ddl(table_names, minimal=True, deadline=state.get("deadline")),
+                get_table_stats(table_names, deadline=state.get("deadline")),
+                return_exceptions=True
+            )
+            if isinstance(ddl_map, Exception):
+                raise ddl_map
+            if isinstance(stats_map, Exception):
+                # Stats only sharpen the prompt; generation works without them
+                print(f"Table stats unavailable: {stats_map}")
+                stats_map = {}
             
             # Format context as structured data
             relevant_tables = []
             for name, ddl in ddl_map.items():
-                relevant_tables.append({"name": name, "ddl_minimal": ddl})
+                stats = stats_map.get(name, {})
+                relevant_tables.append({
+                    "name": name,
+                    "ddl_minimal": ddl,
+                    "row_estimate": stats.get("row_estimate"),
+                    "indexes": stats.get("indexes"),
+                    "partitioning": stats.get("partitioning"),
+                })
             
-            return {"relevant_tables": relevant_tables}
+            if known_tables:
+                print(f"Reusing DDL for {sorted(known_names)}; fetched {table_names}")
+            return {"relevant_tables": known_tables + relevant_tables}
         except Exception as e:
             print(f"Explorer step failed: {e}")
             return {"error_message": f"Explorer failed: {str(e)}"}
@@ -89,7 +196,7 @@ class Agent:
         # Format context from structured state
         context_lines = []
         for t in relevant_tables:
-            context_lines.append(f"Table: {t.get('name')}\nDDL:\n{t.get('ddl_minimal')}\n")
+            context_lines.append(f"Table: {t.get('name')}\nDDL:\n{t.get('ddl_minimal')}\n{self._format_physical(t)}")
         context = "\n".join(context_lines)
         
         if not context:
@@ -106,6 +213,21 @@ class Agent:
         1. Return ONLY the valid SQL query. Do not include markdown formatting (```sql ... ```).
         2. Use correct PostgreSQL syntax.
         3. Do not invent columns that are not in the schema.
+        4. On large tables, filter and join on indexed columns (or the partition key) and keep
+           predicates sargable: do not wrap indexed columns in functions or casts.
+        """
+        if state.get("previous_sql"):
+            prompt += f"""
+        This is a follow-up in an ongoing conversation.
+        Previous request: {state.get('previous_query')}
+        Previous SQL: {state.get('previous_sql')}
+        If the new request refines the previous one, modify the previous SQL; otherwise write a new query.
+        """
+        if state.get("plan_feedback"):
+            prompt += f"""
+        Your previous query was rejected before execution:
+        {state.get('plan_feedback')}
+        Rewrite it so the planner can use indexes or partition pruning.
         """
         
         messages = [
@@ -121,6 +243,65 @@ class Agent:
         except Exception as e:
              return {"error_message": f"Generation failed: {str(e)}"}
 
+    async def cost_check_step(self, state: AgentState):
+        if state.get("error_message") or MAX_PLAN_COST is None:
+            return {}
+
+        sql = state.get('sql_query')
+        try:
+            plan = await explain_query(sql, deadline=state.get("deadline"))
+        except Exception as e:
+            # The EXPLAIN gate is advisory; let the executor surface real errors
+            print(f"Cost check skipped: {e}")
+            # Clear feedback from an earlier over-cost plan so the router stops regenerating
+            return {"plan_feedback": ""}
+
+        cost = plan.get("total_cost")
+        print(f"Estimated plan cost: {cost} (limit {MAX_PLAN_COST})")
+        if cost is None or cost <= MAX_PLAN_COST:
+            return {"plan_cost": cost, "plan_feedback": ""}
+
+        feedback = (
+            f"SQL: {sql}\nEstimated cost {cost:.0f} exceeds the limit of {MAX_PLAN_COST:.0f} "
+            f"(top plan node: {plan.get('node_type')}, ~{plan.get('plan_rows')} rows)."
+        )
+        attempts = state.get("regeneration_count", 0)
+        if attempts < MAX_REGENERATIONS:
+            return {
+                "plan_cost": cost,
+                "plan_feedback": feedback,
+                "regeneration_count": attempts + 1,
+                "reasoning_log": state.get("reasoning_log", []) + [f"Regenerating: plan cost {cost:.0f}"]
+            }
+        return {"plan_cost": cost, "error_message": f"Query rejected: {feedback}"}
+
+    def _route_after_cost_check(self, state: AgentState) -> str:
+        # regeneration_count is incremented before routing, so it bounds the loop here too
+        if (not state.get("error_message") and state.get("plan_feedback")
+                and state.get("regeneration_count", 0) <= MAX_REGENERATIONS):
+            return "generator"
+        return "executor"
+
+    @staticmethod
+    def _format_physical(table: Dict[str, Any]) -> str:
+        """One-line summary of table size, indexes and partitioning for the prompt."""
+        parts = []
+        rows = table.get("row_estimate")
+        if rows is not None and rows >= 0:
+            if rows >= 1_000_000_000:
+                parts.append(f"~{rows / 1_000_000_000:.1f}B rows")
+            elif rows >= 1_000_000:
+                parts.append(f"~{rows / 1_000_000:.1f}M rows")
+            elif rows >= 1_000:
+                parts.append(f"~{rows / 1_000:.1f}K rows")
+            else:
+                parts.append(f"~{rows} rows")
+        if table.get("indexes"):
+            parts.append(f"indexes: {table['indexes']}")
+        if table.get("partitioning"):
+            parts.append(f"partitioned by {table['partitioning']}")
+        return f"Stats: {' | '.join(parts)}\n" if parts else ""
+
     async def execute_step(self, state: AgentState):
         if state.get("error_message"):
             return {}
@@ -128,25 +309,85 @@ class Agent:
         print("Executing SQL...")
         sql = state.get('sql_query')
         try:
-             res = await execute_query(sql)
-             return {"execution_result": res}
+             rows = await execute_query(sql, deadline=state.get("deadline"))
+             handle = result_store.put_rows(rows)
+             print(f"Result: {handle['num_rows']} rows x {len(handle['columns'])} columns")
+             return {"execution_result": handle}
         except Exception as e:
+             if state.get("fast_path_intent"):
+                 print(f"Fast path query failed ({e}); falling back to LLM")
+                 FAST_PATH_METRICS["execution_fallbacks"] += 1
+                 return {"fast_path_intent": None, "fast_path_fallback": True, "sql_query": ""}
              return {"error_message": f"Execution failed: {str(e)}"}
 
-    async def run(self, input_query: str):
+    async def _get_session_workflow(self):
+        if self._session_workflow is None:
+            self._session_workflow = self._build_graph(checkpointer=await self.sessions.open())
+        return self._session_workflow
+
+    async def close(self):
+        await self.sessions.close()
+
+    async def run(self, input_query: str, session_id: Optional[str] = None):
+        workflow, config, prior = self.workflow, None, {}
+        if session_id:
+            workflow = await self._get_session_workflow()
+            config = {"configurable": {"thread_id": session_id}}
+            turn = await self.sessions.touch(session_id)
+            prior = (await workflow.aget_state(config)).values or {}
+            print(f"Session {session_id}, turn {turn}")
+
+        # Only a successful previous turn is worth building on
+        follow_up = bool(prior.get("sql_query")) and not prior.get("error_message")
+
         inputs = {
             "input_query": input_query, 
             "search_query": "",
-            "relevant_tables": [], 
+            "relevant_tables": prior.get("relevant_tables", []) if follow_up else [], 
+            "previous_query": prior.get("input_query", "") if follow_up else "",
+            "previous_sql": prior.get("sql_query", "") if follow_up else "",
+            "skipped_steps": [],
             "reasoning_log": [], 
             "sql_query": "", 
-            "execution_result": [], 
-            "error_message": ""
+            "plan_cost": None,
+            "plan_feedback": "",
+            "regeneration_count": 0,
+            "execution_result": None, 
+            "error_message": "",
+            "deadline": time.time() + QUESTION_TIMEOUT_SECONDS,
+            "fast_path_intent": None,
+            "fast_path_confidence": None,
+            "fast_path_fallback": False,
+            "step_latencies_ms": {}
         }
         
         final_state = inputs
-        async for output in self.workflow.astream(inputs):
+        try:
+            # Cancelling the stream on timeout also cancels the in-flight tool call,
+            # which in turn cancels a running query on the executor
+            await asyncio.wait_for(self._stream(workflow, inputs, final_state, config), timeout=QUESTION_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            METRICS["timeouts"] += 1
+            final_state["error_message"] = f"Question timed out after {QUESTION_TIMEOUT_SECONDS:g}s"
+
+        if final_state.get("fast_path_intent") and final_state.get("execution_result"):
+            FAST_PATH_METRICS["served"] += 1
+            FAST_PATH_METRICS["served_ms_total"] += sum(final_state["step_latencies_ms"].values())
+
+        total_ms = sum(final_state["step_latencies_ms"].values())
+        skipped = final_state.get("skipped_steps") or []
+        print(f"Turn latency: {total_ms:.0f} ms" + (f" (skipped: {', '.join(skipped)})" if skipped else ""))
+        return final_state
+
+    async def _stream(self, workflow, inputs: AgentState, final_state: Dict[str, Any], config=None):
+        step_started = time.perf_counter()
+        # Nodes run sequentially, so the time between stream outputs is the node latency
+        async for output in workflow.astream(inputs, config):
+            now = time.perf_counter()
             for key, value in output.items():
                 print(f"Finished step: {key}")
-                final_state.update(value)
-        return final_state
+                final_state.update(value or {})
+                # Accumulate, since a node can run more than once (e.g. regeneration)
+                latencies = final_state["step_latencies_ms"]
+                latencies[key] = latencies.get(key, 0.0) + (now - step_started) * 1000
+            step_started = now
@@ -0,0 +1,342 @@
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from .tools_client import get_schema_catalog
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.9"))
+CATALOG_TTL_SECONDS = float(os.getenv("FAST_PATH_CATALOG_TTL_SECONDS", "300"))
+LIST_LIMIT = int(os.getenv("FAST_PATH_LIST_LIMIT", "1000"))
+DEFAULT_TOP_N = 10
+# Counts, sorts and filters over larger tables go through the LLM path and its EXPLAIN gate
+MAX_ROW_ESTIMATE = int(os.getenv("FAST_PATH_MAX_ROW_ESTIMATE", "1000000"))
+
+# Each word the matcher cannot account for costs this much confidence
+UNKNOWN_WORD_PENALTY = 0.25
+
+COUNT_CUES = {"count", "many"}
+LIST_CUES = {"list", "show", "get", "display", "give", "find", "fetch", "return"}
+DESC_CUES = {"latest", "newest", "recent", "last", "top", "highest", "largest", "biggest"}
+ASC_CUES = {"oldest", "earliest", "first", "lowest", "smallest", "bottom"}
+TIME_CUES = {"latest", "newest", "recent", "last", "oldest", "earliest", "first"}
+EQUALS_CUES = {"is", "=", "equals", "equal", "of"}
+# Negation, comparison, disjunction, aggregation, relative clauses and prepositional
+# conditions ("in 2023", "in stock", "from alice") have no template; these decline
+# outright rather than relying on the confidence penalty
+DECLINE_CUES = {
+    "not", "no", "non", "without", "except", "excluding", "never", "isn", "aren", "doesn", "don", "didn",
+    "than", "below", "above", "under", "over", "between", "cheaper", "greater", "fewer", "less", "more",
+    "or", "who", "per", "each", "sum", "average", "avg", "mean", "min", "max", "minimum", "maximum",
+    "in", "from", "for", "since", "during", "before", "after",
+}
+FILLER = {
+    "how", "number", "me", "the", "a", "an", "of", "are", "is", "there", "do", "does", "we",
+    "i", "have", "has", "our", "all", "every", "please", "can", "you", "total", "with",
+    "where", "whose", "that", "to", "by", "most", "records", "rows", "entries", "exist",
+}
+
+NUMERIC_TYPES = {"int2", "int4", "int8", "serial", "bigserial", "numeric", "float4", "float8", "decimal"}
+TIME_COLUMN_PREFERENCE = ["created_at", "updated_at", "timestamp", "date"]
+
+# Fast-path counters; see report()
+METRICS: Dict[str, float] = {
+    "questions": 0,
+    "served": 0,
+    "execution_fallbacks": 0,
+    "match_ms_total": 0.0,
+    "served_ms_total": 0.0,
+}
+
+_TOKEN_RE = re.compile(r"'[^']*'|\"[^\"]*\"|[\w@\-]+(?:\.[\w@\-]+)*|=")
+
+
+def _singular(word: str) -> str:
+    # status, analysis, address are already singular
+    if word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _alias_keys(name: str) -> List[Tuple[str, ...]]:
+    """Singularized word sequences a table or column can be referred to by."""
+    parts = [_singular(p) for p in name.lower().split("_") if p]
+    return list({tuple(parts), (_singular(name.lower()),)})
+
+
+def _quote_ident(name: str) -> str:
+    return name if re.fullmatch(r"[a-z_][a-z0-9_]*", name) else '"' + name.replace('"', '""') + '"'
+
+
+def _is_numeric(value: str) -> bool:
+    return re.fullmatch(r"-?\d+(\.\d+)?", value) is not None
+
+
+class FastPath:
+    """
+    Deterministic text-to-SQL for simple single-table questions (count, list,
+    top-N by column, equality filters), matched against the schema catalog
+    and column profiles produced by ingestion. Returns None whenever the
+    question falls outside these templates so the LLM path can take over.
+    """
+
+    def __init__(self):
+        self._catalog: List[Dict[str, Any]] = []
+        self._catalog_loaded_at = 0.0
+
+    async def _get_catalog(self, deadline: Optional[float]) -> List[Dict[str, Any]]:
+        if not self._catalog or time.time() - self._catalog_loaded_at > CATALOG_TTL_SECONDS:
+            self._catalog = await get_schema_catalog(deadline=deadline)
+            self._catalog_loaded_at = time.time()
+        return self._catalog
+
+    async def try_match(self, question: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return {"sql", "intent", "table", "confidence"} if the question fits a template."""
+        started = time.perf_counter()
+        METRICS["questions"] += 1
+        try:
+            catalog = await self._get_catalog(deadline)
+            return self.match(question, catalog)
+        except Exception as e:
+            print(f"Fast path unavailable: {e}")
+            return None
+        finally:
+            METRICS["match_ms_total"] += (time.perf_counter() - started) * 1000
+
+    def match(self, question: str, catalog: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        raw_tokens = _TOKEN_RE.findall(question)
+        if any(t.lower() in DECLINE_CUES for t in raw_tokens):
+            return None
+        words = [_singular(t.lower()) if t[0] not in "'\"" else t for t in raw_tokens]
+        used = [False] * len(words)
+
+        # 1. Exactly one table must be mentioned
+        table_aliases = {key: t for t in catalog for key in _alias_keys(t["name"])}
+        spans = self._take_spans(words, used, table_aliases)
+        if len({t["name"] for t, _, _ in spans}) != 1:
+            return None
+        table, table_start, table_len = spans[0]
+        table_end = table_start + table_len - 1
+        # "latest order" asks for one row, "latest orders" for several
+        table_plural = raw_tokens[table_end].lower() != words[table_end]
+        columns = table.get("columns", [])
+        column_aliases = {key: c for c in columns for key in _alias_keys(c["name"])}
+
+        # 2. Intent cues
+        lowered = [t.lower() for t in raw_tokens]
+        is_count = "count" in lowered or ("how" in lowered and "many" in lowered) or (
+            "number" in lowered and "of" in lowered
+        )
+        has_cue = is_count
+        order_dir = None
+        time_order = False
+        for i, w in enumerate(lowered):
+            # Skip cue words that start a multi-word column name (e.g. last_name)
+            if used[i] or tuple(words[i:i + 2]) in column_aliases:
+                continue
+            if w in COUNT_CUES or w in LIST_CUES:
+                has_cue = True
+                used[i] = True
+            elif w in DESC_CUES or w in ASC_CUES:
+                direction = "DESC" if w in DESC_CUES else "ASC"
+                if order_dir and order_dir != direction:
+                    return None
+                order_dir = direction
+                time_order = time_order or w in TIME_CUES
+                has_cue = True
+                used[i] = True
+
+        # 3. Explicit ordering column: "... by <column>"
+        order_col = None
+        for i, w in enumerate(lowered):
+            if w == "by" and not used[i]:
+                col, _ = self._column_at(words, used, i + 1, column_aliases)
+                if col:
+                    order_col = col
+                    used[i] = True
+
+        # 4. Equality filters: "<column> [is] <value>" or a known common value
+        filters: List[Tuple[Dict[str, Any], str]] = []
+        projection: List[Dict[str, Any]] = []
+        for i in range(len(words)):
+            if used[i]:
+                continue
+            col, span = self._column_at(words, used, i, column_aliases)
+            if col:
+                j = i + span
+                while j < len(words) and not used[j] and lowered[j] in EQUALS_CUES:
+                    j += 1
+                value = self._value_at(raw_tokens, words, used, j, col, column_aliases, table_aliases)
+                if value is not None:
+                    filters.append((col, value))
+                    for k in range(i, j + 1):
+                        used[k] = True
+                else:
+                    projection.append(col)
+                continue
+            col, value = self._common_value(raw_tokens[i], columns)
+            if col:
+                filters.append((col, value))
+                used[i] = True
+
+        # Two values for one column ("pending orders with status completed") cannot both hold
+        if len({c["name"] for c, _ in filters}) != len(filters):
+            return None
+
+        # 5. Row count: a number right after a list/order cue ("top 5", "show 5 orders") or
+        #    right before the plural table noun ("5 orders"). Any other number is a value the
+        #    templates cannot place ("order 42", "the 2023 orders"), so decline.
+        limit = None
+        for i, t in enumerate(raw_tokens):
+            if not used[i] and t.isdigit():
+                prev = lowered[i - 1] if i > 0 else ""
+                after_cue = prev in LIST_CUES or prev in DESC_CUES or prev in ASC_CUES
+                before_plural = i + 1 == table_start and table_plural and prev != "the"
+                if limit is not None or not (after_cue or before_plural):
+                    return None
+                limit = int(t)
+                has_cue = True
+                used[i] = True
+        if order_dir and limit is None and not table_plural:
+            limit = 1
+
+        # 6. Build SQL for the recognized intent
+        if not has_cue:
+            return None
+        if time_order and order_col is None:
+            order_col = self._time_column(columns)
+            if order_col is None:
+                return None
+        if order_dir and order_col is None:
+            return None
+        row_estimate = table.get("row_estimate")
+        if (row_estimate is not None and row_estimate > MAX_ROW_ESTIMATE
+                and (is_count or order_col or filters)):
+            return None
+
+        where = ""
+        if filters:
+            where = " WHERE " + " AND ".join(
+                f"{_quote_ident(c['name'])} = {self._literal(c, v)}" for c, v in filters
+            )
+        name = _quote_ident(table["name"])
+
+        if is_count:
+            if order_col or projection or limit is not None:
+                return None
+            intent = "count"
+            sql = f"SELECT COUNT(*) AS count FROM {name}{where}"
+        else:
+            select = ", ".join(_quote_ident(c["name"]) for c in projection) or "*"
+            if order_col and order_dir:
+                intent = "top_n"
+                sql = (
+                    f"SELECT {select} FROM {name}{where} "
+                    f"ORDER BY {_quote_ident(order_col['name'])} {order_dir} "
+                    f"LIMIT {limit or DEFAULT_TOP_N}"
+                )
+            elif order_col:
+                # "list users by username": sorted listing, no implied top-N
+                intent = "list"
+                sql = (
+                    f"SELECT {select} FROM {name}{where} "
+                    f"ORDER BY {_quote_ident(order_col['name'])} "
+                    f"LIMIT {limit or LIST_LIMIT}"
+                )
+            else:
+                intent = "filter" if filters else "list"
+                sql = f"SELECT {select} FROM {name}{where} LIMIT {limit or LIST_LIMIT}"
+
+        unknown = [t for i, t in enumerate(lowered) if not used[i] and t not in FILLER]
+        confidence = max(0.0, 1.0 - UNKNOWN_WORD_PENALTY * len(unknown))
+        return {"sql": sql, "intent": intent, "table": table["name"], "confidence": confidence}
+
+    @staticmethod
+    def _take_spans(words: List[str], used: List[bool],
+                    aliases: Dict[Tuple[str, ...], Any]) -> List[Tuple[Any, int, int]]:
+        """Mark the longest alias matches (up to 3 words); returns (target, start, length) per match."""
+        found = []
+        i = 0
+        while i < len(words):
+            for n in (3, 2, 1):
+                key = tuple(words[i:i + n])
+                if len(key) == n and not any(used[i:i + n]) and key in aliases:
+                    found.append((aliases[key], i, n))
+                    for k in range(i, i + n):
+                        used[k] = True
+                    i += n - 1
+                    break
+            i += 1
+        return found
+
+    @staticmethod
+    def _column_at(words, used, i, aliases) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Match a column name starting at word i; returns (column, words consumed)."""
+        for n in (3, 2, 1):
+            key = tuple(words[i:i + n])
+            if len(key) == n and not any(used[i:i + n]) and key in aliases:
+                for k in range(i, i + n):
+                    used[k] = True
+                return aliases[key], n
+        return None, 0
+
+    @staticmethod
+    def _value_at(raw_tokens, words, used, j, col, column_aliases, table_aliases) -> Optional[str]:
+        if j >= len(raw_tokens) or used[j]:
+            return None
+        token = raw_tokens[j]
+        if token[0] in "'\"":
+            return token[1:-1]
+        if (words[j],) in column_aliases or (words[j],) in table_aliases or token.lower() in FILLER:
+            return None
+        if col.get("type") in NUMERIC_TYPES and not _is_numeric(token):
+            return None
+        # Prefer the stored spelling of a known value
+        for v in col.get("most_common_vals") or []:
+            if v.lower() == token.lower():
+                return v
+        return token
+
+    @staticmethod
+    def _common_value(token: str, columns: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """A bare word that is a frequent value of exactly one column, e.g. 'pending'."""
+        hits = [
+            (c, v) for c in columns for v in (c.get("most_common_vals") or [])
+            if v.lower() == token.strip("'\"").lower()
+        ]
+        return hits[0] if len({c["name"] for c, _ in hits}) == 1 else (None, None)
+
+    @staticmethod
+    def _time_column(columns: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        temporal = [c for c in columns if str(c.get("type", "")).startswith(("timestamp", "date"))]
+        for preferred in TIME_COLUMN_PREFERENCE:
+            for c in temporal:
+                if c["name"] == preferred:
+                    return c
+        return temporal[0] if temporal else None
+
+    @staticmethod
+    def _literal(col: Dict[str, Any], value: str) -> str:
+        if col.get("type") in NUMERIC_TYPES and _is_numeric(value):
+            return value
+        return "'" + value.replace("'", "''") + "'"
+
+
+def report() -> Dict[str, Any]:
+    """Share of questions answered without LLM calls and the latency involved."""
+    questions = METRICS["questions"]
+    served = METRICS["served"]
+    return {
+        "questions": int(questions),
+        "served": int(served),
+        "served_fraction": served / questions if questions else 0.0,
+        "execution_fallbacks": int(METRICS["execution_fallbacks"]),
+        "mean_match_ms": METRICS["match_ms_total"] / questions if questions else None,
+        "mean_served_total_ms": METRICS["served_ms_total"] / served if served else None,
+    }
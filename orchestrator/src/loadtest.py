@@ -0,0 +1,287 @@
+import os
+import math
+import io
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from .agent import Agent
+from .result_store import result_store
+from .fast_path import report as fast_path_report
+from .tools_client import search_schema, get_table_ddl, get_neighbors, get_column_samples, METRICS
+
+# Explorer tool endpoints that can be replayed, keyed by their URL name
+TOOL_CALLS = {
+    "search_schema_index": search_schema,
+    "get_table_ddl": get_table_ddl,
+    "get_table_neighbors": get_neighbors,
+    "get_column_samples": get_column_samples,
+}
+
+# Used when no corpus file is given; matches postgres_init/init.sql
+DEFAULT_CORPUS = {
+    "questions": [
+        {"question": "How many orders are there?", "sql": "SELECT COUNT(*) FROM orders"},
+        {"question": "List all products", "sql": "SELECT * FROM products"},
+        {"question": "Show me all users who bought a Laptop",
+         "sql": "SELECT DISTINCT u.* FROM users u JOIN orders o ON o.user_id = u.id "
+                "JOIN order_items oi ON oi.order_id = o.id JOIN products p ON p.id = oi.product_id "
+                "WHERE p.name = 'Laptop'"},
+    ],
+    "tool_calls": [
+        {"endpoint": "search_schema_index", "payload": {"query": "orders users", "limit": 5}},
+        {"endpoint": "get_table_ddl", "payload": {"table_names": ["orders", "users"], "minimal": True}},
+        {"endpoint": "get_column_samples", "payload": {"table_name": "orders", "column_name": "status"}},
+    ],
+}
+
+
+class _StandInResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StandInLLM:
+    """
+    Offline replacement for ChatOpenAI. The planner gets the question back as
+    its search terms; the generator gets the SQL recorded in the corpus for
+    that question (or a trivial query). An optional sleep emulates LLM latency.
+    """
+
+    def __init__(self, sql_by_question: Dict[str, str], latency_ms: float = 0.0):
+        self.sql_by_question = sql_by_question
+        self.latency_ms = latency_ms
+
+    async def ainvoke(self, messages):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        prompt = messages[-1].content
+        if "Schema Context:" not in prompt:
+            return _StandInResponse(prompt)
+        for question, sql in self.sql_by_question.items():
+            if question in prompt:
+                return _StandInResponse(sql)
+        return _StandInResponse("SELECT 1")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], errors: int) -> Dict[str, Any]:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+class LoadTest:
+    def __init__(self, corpus: Dict[str, Any], llm_latency_ms: float = 0.0, verbose: bool = False):
+        self.questions: List[Dict[str, str]] = corpus.get("questions", [])
+        self.tool_calls: List[Dict[str, Any]] = corpus.get("tool_calls", [])
+        self.verbose = verbose
+        sql_by_question = {q["question"]: q.get("sql", "SELECT 1") for q in self.questions}
+        self.agent = Agent(llm=StandInLLM(sql_by_question, latency_ms=llm_latency_ms))
+
+        # Interleave questions and tool calls so every stage exercises both
+        self.work: List[Tuple[str, Dict[str, Any]]] = (
+            [("agent", q) for q in self.questions] + [("tool", t) for t in self.tool_calls]
+        )
+        if not self.work:
+            raise ValueError("Corpus contains no questions or tool calls")
+
+    async def _run_agent(self, item: Dict[str, Any], samples: List[Tuple[str, float, bool]]):
+        started = time.perf_counter()
+        try:
+            state = await self.agent.run(item["question"])
+            ok = not state.get("error_message")
+            if state.get("execution_result"):
+                result_store.release(state["execution_result"])
+            for node, latency in state.get("step_latencies_ms", {}).items():
+                samples.append((f"agent.{node}", latency, ok))
+        except Exception:
+            state = {}
+            ok = False
+        total_ms = (time.perf_counter() - started) * 1000
+        samples.append(("agent.total", total_ms, ok))
+        if ok and state.get("fast_path_intent"):
+            samples.append(("agent.total_fast_path", total_ms, ok))
+
+    async def _run_tool(self, item: Dict[str, Any], samples: List[Tuple[str, float, bool]]):
+        endpoint = item["endpoint"]
+        started = time.perf_counter()
+        try:
+            await TOOL_CALLS[endpoint](**item.get("payload", {}))
+            ok = True
+        except Exception:
+            ok = False
+        samples.append((f"tool.{endpoint}", (time.perf_counter() - started) * 1000, ok))
+
+    async def run_stage(self, concurrency: int, rate: float, total_requests: int) -> Dict[str, Any]:
+        """
+        Run one stage. With rate > 0 arrivals are open-loop (Poisson at `rate`
+        per second) and capped at `concurrency` in flight; with rate == 0 the
+        stage is closed-loop at `concurrency`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        samples: List[Tuple[str, float, bool]] = []
+        queue_waits: List[float] = []
+
+        async def one(kind: str, item: Dict[str, Any]):
+            arrived = time.perf_counter()
+            async with semaphore:
+                queue_waits.append((time.perf_counter() - arrived) * 1000)
+                if kind == "agent":
+                    await self._run_agent(item, samples)
+                else:
+                    await self._run_tool(item, samples)
+
+        stage_started = time.perf_counter()
+        tasks = []
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            for i in range(total_requests):
+                kind, item = self.work[i % len(self.work)]
+                tasks.append(asyncio.create_task(one(kind, item)))
+                if rate > 0:
+                    await asyncio.sleep(random.expovariate(rate))
+            await asyncio.gather(*tasks)
+        duration = time.perf_counter() - stage_started
+
+        by_label: Dict[str, List[Tuple[float, bool]]] = {}
+        for label, latency, ok in samples:
+            by_label.setdefault(label, []).append((latency, ok))
+
+        requests = [s for s in samples if s[0] == "agent.total" or s[0].startswith("tool.")]
+        errors = sum(1 for s in requests if not s[2])
+        return {
+            "concurrency": concurrency,
+            "arrival_rate": rate,
+            "requests": len(requests),
+            "errors": errors,
+            "error_rate": errors / len(requests) if requests else 0.0,
+            "duration_s": duration,
+            "throughput_rps": len(requests) / duration if duration else 0.0,
+            "queue_wait_p95_ms": percentile(queue_waits, 95),
+            "latency": {
+                label: summarize([l for l, _ in values], sum(1 for _, ok in values if not ok))
+                for label, values in sorted(by_label.items())
+            },
+        }
+
+
+def detect_saturation(
+    stages: List[Dict[str, Any]],
+    min_throughput_gain: float = 0.1,
+    max_latency_growth: float = 1.5,
+    max_error_rate: float = 0.05,
+) -> Dict[str, Any]:
+    """
+    Walk stages in order of concurrency and report the first one where adding
+    load stopped buying throughput while p95 latency grew, or errors spiked.
+    """
+    previous = None
+    for stage in sorted(stages, key=lambda s: s["concurrency"]):
+        p95 = (stage["latency"].get("agent.total") or {}).get("p95_ms")
+        if p95 is None:
+            p95 = max((v["p95_ms"] or 0) for v in stage["latency"].values()) if stage["latency"] else 0
+        stage["_p95"] = p95
+
+        reason = None
+        if stage["error_rate"] > max_error_rate:
+            reason = f"error rate {stage['error_rate']:.1%} above {max_error_rate:.0%}"
+        elif previous is not None:
+            gain = (stage["throughput_rps"] - previous["throughput_rps"]) / max(previous["throughput_rps"], 1e-9)
+            growth = p95 / max(previous["_p95"], 1e-9)
+            if gain < min_throughput_gain and growth > max_latency_growth:
+                reason = f"throughput gain {gain:.1%} while p95 grew {growth:.1f}x"
+
+        if reason:
+            for s in stages:
+                s.pop("_p95", None)
+            return {
+                "saturated": True,
+                "saturation_concurrency": stage["concurrency"],
+                "max_sustainable_concurrency": previous["concurrency"] if previous else None,
+                "reason": reason,
+            }
+        previous = stage
+
+    for s in stages:
+        s.pop("_p95", None)
+    return {
+        "saturated": False,
+        "saturation_concurrency": None,
+        "max_sustainable_concurrency": previous["concurrency"] if previous else None,
+        "reason": None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay questions and tool calls against the running services.")
+    parser.add_argument("--corpus", help="JSON file with 'questions' and 'tool_calls' (defaults to a built-in sample)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated concurrency levels, one stage each")
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrival rate per second (0 = closed loop)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per stage")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency of the stand-in LLM")
+    parser.add_argument("--out", default="loadtest_report.json", help="Report file")
+    parser.add_argument("--verbose", action="store_true", help="Show agent output while running")
+    args = parser.parse_args()
+
+    corpus = DEFAULT_CORPUS
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = json.load(f)
+
+    load_test = LoadTest(corpus, llm_latency_ms=args.llm_latency_ms, verbose=args.verbose)
+    stages = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        stage = await load_test.run_stage(concurrency, args.rate, args.requests)
+        total = stage["latency"].get("agent.total", {})
+        fmt = lambda v: "-" if v is None else f"{v:.1f}"
+        print(
+            f"[LoadTest] c={concurrency}: {stage['throughput_rps']:.1f} req/s, "
+            f"agent p50={fmt(total.get('p50_ms'))} p95={fmt(total.get('p95_ms'))} "
+            f"p99={fmt(total.get('p99_ms'))} ms, errors={stage['errors']}"
+        )
+        stages.append(stage)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "corpus": args.corpus or "builtin",
+            "concurrency": args.concurrency,
+            "arrival_rate": args.rate,
+            "requests_per_stage": args.requests,
+            "llm": "stand-in",
+            "llm_latency_ms": args.llm_latency_ms,
+            "explorer_url": os.getenv("EXPLORER_URL", "http://localhost:8081"),
+            "executor_url": os.getenv("EXECUTOR_URL", "http://localhost:8082"),
+        },
+        "stages": stages,
+        "saturation": detect_saturation(stages),
+        "client_metrics": dict(METRICS),
+        "fast_path": fast_path_report(),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[LoadTest] Saturation: {report['saturation']}")
+    print(f"[LoadTest] Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
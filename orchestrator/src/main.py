@@ -6,27 +6,55 @@ load_dotenv()
 
 try:
     from src.agent import Agent
+    from src.result_store import result_store
 except ImportError:
     # Fallback if run directly from src/ directory or similar context
     from agent import Agent
+    from result_store import result_store
 
 async def main():
     print("Orchestrator Service Initialized")
-    if len(sys.argv) > 1:
-        query = " ".join(sys.argv[1:])
+    args = sys.argv[1:]
+    session_id = None
+    export_path = None
+    while len(args) >= 2 and args[0] in ("--session", "--export"):
+        if args[0] == "--session":
+            # Follow-up questions in the same session reuse earlier tables and SQL
+            session_id = args[1]
+        else:
+            export_path = args[1]
+        args = args[2:]
+
+    if args:
+        query = " ".join(args)
         print(f"Received query: {query}")
         
         agent = Agent()
         try:
-            result = await agent.run(query)
+            result = await agent.run(query, session_id=session_id)
             print("Final Result:")
             print(result)
+            handle = result.get("execution_result")
+            if handle:
+                print(f"Preview ({handle['num_rows']} rows total):")
+                for row in result_store.preview(handle, limit=10):
+                    print(row)
+                if export_path:
+                    # The full result goes to disk; only the preview is materialized as dicts
+                    if export_path.endswith(".parquet"):
+                        result_store.export_parquet(handle, export_path)
+                    else:
+                        result_store.export_csv(handle, export_path)
+                    print(f"Exported {handle['num_rows']} rows to {export_path}")
+                result_store.release(handle)
         except Exception as e:
             print(f"Error during execution: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            await agent.close()
     else:
-        print("Usage: python -m src.main <query>")
+        print("Usage: python -m src.main [--session <id>] [--export <file.csv|file.parquet>] <query>")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,111 @@
+import os
+import uuid
+import tempfile
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from .state import ResultHandle
+
+# Results larger than this (in Arrow buffer bytes) are spilled to disk
+SPILL_THRESHOLD_BYTES = int(os.getenv("RESULT_SPILL_THRESHOLD_BYTES", str(8 * 1024 * 1024)))
+SPILL_DIR = os.getenv("RESULT_SPILL_DIR", os.path.join(tempfile.gettempdir(), "curiosity-results"))
+# Results kept before the least recently used one is released (memory and spill file)
+MAX_RESULTS = int(os.getenv("RESULT_STORE_MAX_RESULTS", "100"))
+
+
+class ResultStore:
+    """
+    Holds query results in columnar form (one typed Arrow array per column,
+    column names stored once). Small results stay in memory; results above
+    the spill threshold are written to an Arrow IPC file and memory-mapped
+    back on access. The agent state only carries a lightweight ResultHandle.
+
+    Callers release a handle once they have consumed it; as a backstop, only
+    the `max_results` most recently used results are kept.
+    """
+
+    def __init__(self, spill_threshold_bytes: int = SPILL_THRESHOLD_BYTES, spill_dir: str = SPILL_DIR,
+                 max_results: int = MAX_RESULTS):
+        self.spill_threshold_bytes = spill_threshold_bytes
+        self.spill_dir = spill_dir
+        self.max_results = max_results
+        self._tables: Dict[str, pa.Table] = {}
+        # Every live result in least-recently-used order, with its spill path (or None)
+        self._live: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+    def put_rows(self, rows: List[Dict[str, Any]]) -> ResultHandle:
+        """Convert executor rows (list of dicts) into a columnar table and store it."""
+        columns: List[str] = list(rows[0].keys()) if rows else []
+        arrays = [self._to_array([row.get(c) for row in rows]) for c in columns]
+        table = pa.Table.from_arrays(arrays, names=columns) if columns else pa.table({})
+        return self.put_table(table)
+
+    def put_table(self, table: pa.Table) -> ResultHandle:
+        result_id = uuid.uuid4().hex
+        path = None
+        if table.nbytes > self.spill_threshold_bytes:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{result_id}.arrow")
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            print(f"[ResultStore] Spilled {table.num_rows} rows ({table.nbytes} bytes) to {path}")
+        else:
+            self._tables[result_id] = table
+
+        self._live[result_id] = path
+        while len(self._live) > self.max_results:
+            oldest_id, oldest_path = self._live.popitem(last=False)
+            self.release({"result_id": oldest_id, "path": oldest_path})
+
+        return {
+            "result_id": result_id,
+            "columns": table.column_names,
+            "num_rows": table.num_rows,
+            "path": path,
+        }
+
+    def get_table(self, handle: ResultHandle) -> pa.Table:
+        """Return the Arrow table behind a handle (memory-mapped if spilled)."""
+        if handle["result_id"] in self._live:
+            self._live.move_to_end(handle["result_id"])
+        if handle.get("path"):
+            # The returned buffers keep the mapping alive; the file handle itself can close
+            with pa.memory_map(handle["path"], "r") as source:
+                return pa.ipc.open_file(source).read_all()
+        table = self._tables.get(handle["result_id"])
+        if table is None:
+            raise KeyError(f"Unknown result: {handle['result_id']}")
+        return table
+
+    def preview(self, handle: ResultHandle, limit: int = 10) -> List[Dict[str, Any]]:
+        """Materialize only the first `limit` rows as Python dicts."""
+        if not handle["columns"]:
+            return []
+        return self.get_table(handle).slice(0, limit).to_pylist()
+
+    def export_csv(self, handle: ResultHandle, path: str):
+        pacsv.write_csv(self.get_table(handle), path)
+
+    def export_parquet(self, handle: ResultHandle, path: str):
+        pq.write_table(self.get_table(handle), path)
+
+    def release(self, handle: ResultHandle):
+        """Drop a result from memory and delete its spill file."""
+        self._live.pop(handle["result_id"], None)
+        self._tables.pop(handle["result_id"], None)
+        if handle.get("path") and os.path.exists(handle["path"]):
+            os.remove(handle["path"])
+
+    @staticmethod
+    def _to_array(values: List[Any]) -> pa.Array:
+        # JSON can mix types within a column (e.g. numeric + string); fall back to text
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+result_store = ResultStore()
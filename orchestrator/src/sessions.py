@@ -0,0 +1,141 @@
+import os
+import re
+import time
+import aiosqlite
+from typing import List, Optional, Set
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from .state import TableSchema
+from .fast_path import _singular
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(os.path.expanduser("~"), ".curiosity", "sessions.sqlite"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+
+# Words that refine a previous question rather than name new schema concepts
+FOLLOW_UP_STOPWORDS = {
+    "now", "only", "just", "instead", "also", "same", "but", "then", "and", "the", "for", "with",
+    "without", "what", "about", "how", "many", "show", "list", "give", "get", "them", "those",
+    "these", "that", "this", "their", "its", "from", "into", "than", "more", "less", "most",
+    "least", "top", "bottom", "first", "last", "next", "previous", "latest", "oldest", "newest",
+    "day", "days", "week", "weeks", "month", "months", "quarter", "year", "years", "today",
+    "yesterday", "ago", "since", "before", "after", "between", "per", "each", "every", "all",
+    "sort", "sorted", "order", "ordered", "group", "grouped", "by", "count", "total", "sum",
+    "average", "avg", "min", "max", "limit", "descending", "ascending", "exclude", "include",
+    "where", "which", "who", "please", "again", "too", "not", "any", "one", "ones",
+    "above", "below", "over", "under", "greater", "smaller", "higher", "lower", "equal",
+}
+
+
+class SessionStore:
+    """
+    Persists conversation state through a LangGraph SQLite checkpointer and
+    keeps it bounded: sessions idle longer than the TTL, and the oldest
+    sessions beyond the size limit, are deleted from the checkpoint store.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl_seconds: float = SESSION_TTL_SECONDS,
+                 max_sessions: int = SESSION_MAX_SESSIONS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.saver: Optional[AsyncSqliteSaver] = None
+        self._conn: Optional[aiosqlite.Connection] = None
+
+    async def open(self) -> AsyncSqliteSaver:
+        if self.saver:
+            return self.saver
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        self.saver = AsyncSqliteSaver(self._conn)
+        await self.saver.setup()
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "thread_id TEXT PRIMARY KEY, last_used REAL NOT NULL, turns INTEGER NOT NULL DEFAULT 0)"
+        )
+        await self._conn.commit()
+        return self.saver
+
+    async def touch(self, session_id: str) -> int:
+        """Record a turn for the session, evict stale ones, and return the turn number."""
+        await self.open()
+        await self._conn.execute(
+            "INSERT INTO sessions (thread_id, last_used, turns) VALUES (?, ?, 1) "
+            "ON CONFLICT(thread_id) DO UPDATE SET last_used = excluded.last_used, turns = turns + 1",
+            (session_id, time.time())
+        )
+        await self._conn.commit()
+        await self.evict()
+        async with self._conn.execute("SELECT turns FROM sessions WHERE thread_id = ?", (session_id,)) as cur:
+            row = await cur.fetchone()
+        return row[0] if row else 1
+
+    async def evict(self) -> int:
+        """Delete sessions past their TTL or beyond the size limit; returns how many were removed."""
+        await self.open()
+        async with self._conn.execute(
+            "SELECT thread_id FROM sessions WHERE last_used < ?", (time.time() - self.ttl_seconds,)
+        ) as cur:
+            expired = [r[0] for r in await cur.fetchall()]
+        async with self._conn.execute(
+            "SELECT thread_id FROM sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_sessions,)
+        ) as cur:
+            overflow = [r[0] for r in await cur.fetchall()]
+
+        evicted = set(expired) | set(overflow)
+        for thread_id in evicted:
+            await self.saver.adelete_thread(thread_id)
+            await self._conn.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+        if evicted:
+            await self._conn.commit()
+            print(f"[Sessions] Evicted {len(evicted)} session(s)")
+        return len(evicted)
+
+    async def close(self):
+        if self._conn:
+            await self._conn.close()
+        self._conn = None
+        self.saver = None
+
+
+# Column names in "TABLE t (a int4, b varchar)" or "CREATE TABLE t (\n  a int4 ...,"
+_DDL_COLUMN_RE = re.compile(r'[(,]\s*"?([A-Za-z_][\w$]*)"?\s+[A-Za-z]')
+_DDL_FK_RE = re.compile(r'FOREIGN KEY\s*\(\s*"?(\w+)"?\s*\)|"?(\w+)"?\s+\w+[^,]*\bREFERENCES\b', re.I)
+
+
+def _covered_terms(table: TableSchema) -> Set[str]:
+    """
+    Singular words a retrieved table answers for: its own name and its
+    non-reference column names. Foreign-key columns such as user_id are left
+    out, since they point at a table whose schema was not retrieved.
+    """
+    ddl = str(table.get("ddl_minimal") or "")
+    references = {fk or col for fk, col in _DDL_FK_RE.findall(ddl)}
+    covered = {_singular(p) for p in str(table.get("name", "")).lower().split("_") if p}
+    for column in _DDL_COLUMN_RE.findall(ddl):
+        column = column.lower()
+        if column in references or column.endswith("_id") or column in ("table", "create", "foreign", "primary"):
+            continue
+        covered |= {_singular(p) for p in column.split("_") if p}
+    return covered
+
+
+def new_concepts(question: str, relevant_tables: List[TableSchema]) -> List[str]:
+    """
+    Terms in a follow-up question that are not already covered by the tables
+    retrieved in earlier turns (table names and non-reference column names).
+    Only these need a fresh schema search.
+    """
+    known: Set[str] = set()
+    for t in relevant_tables:
+        known |= _covered_terms(t)
+
+    terms = []
+    for word in re.findall(r"[a-z]+", question.lower()):
+        if len(word) < 3 or word in FOLLOW_UP_STOPWORDS:
+            continue
+        if _singular(word) in known:
+            continue
+        if word not in terms:
+            terms.append(word)
+    return terms
@@ -5,6 +5,19 @@ class TableSchema(TypedDict):
     description: Optional[str]
     ddl_minimal: Optional[str]
     ddl_raw: Optional[str]
+    row_estimate: Optional[int]
+    indexes: Optional[str]
+    partitioning: Optional[str]
+
+class ResultHandle(TypedDict):
+    """
+    Reference to a columnar query result held by the ResultStore.
+    `path` is set when the result was spilled to a memory-mapped Arrow file.
+    """
+    result_id: str
+    columns: List[str]
+    num_rows: int
+    path: Optional[str]
 
 class AgentState(TypedDict):
     """
@@ -16,8 +29,27 @@ class AgentState(TypedDict):
     # Scratchpad
     relevant_tables: List[TableSchema]
     reasoning_log: List[str]
+
+    # Conversation context carried over from the previous turn of a session
+    previous_query: Optional[str]
+    previous_sql: Optional[str]
+    skipped_steps: List[str]
     
+    # Template fast path (set when the question was answered without LLM calls)
+    fast_path_intent: Optional[str]
+    fast_path_confidence: Optional[float]
+    fast_path_fallback: bool
+
     # Validation
     sql_query: Optional[str]
-    execution_result: Optional[List[Dict[str, Any]]]
+    plan_cost: Optional[float]
+    plan_feedback: Optional[str]
+    regeneration_count: int
+    execution_result: Optional[ResultHandle]
     error_message: Optional[str]
+
+    # Absolute deadline (epoch seconds) for the whole question
+    deadline: Optional[float]
+
+    # Instrumentation (filled in by Agent.run, not by graph nodes)
+    step_latencies_ms: Dict[str, float]
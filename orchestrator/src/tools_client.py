@@ -1,41 +1,117 @@
 import httpx
 import os
+import time
+import uuid
+import asyncio
 from typing import List, Optional, Dict, Any
 
 EXPLORER_URL = os.getenv("EXPLORER_URL", "http://localhost:8081")
 EXECUTOR_URL = os.getenv("EXECUTOR_URL", "http://localhost:8082")
 
-async def search_schema(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+# Used when a call has no deadline of its own
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("TOOLS_HTTP_TIMEOUT_SECONDS", "30"))
+
+# Absolute deadline (epoch milliseconds) propagated to the explorer and executor
+DEADLINE_HEADER = "X-Request-Deadline"
+REQUEST_ID_HEADER = "X-Request-Id"
+
+# Client-side counters for deadline expiry and server-side query cancellation
+METRICS: Dict[str, int] = {"timeouts": 0, "cancellations": 0}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a tool call cannot complete before the question's deadline."""
+
+
+def _request_options(deadline: Optional[float]):
+    """Translate an absolute deadline (epoch seconds) into an httpx timeout and headers."""
+    if deadline is None:
+        return httpx.Timeout(DEFAULT_TIMEOUT_SECONDS), {}
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        METRICS["timeouts"] += 1
+        raise DeadlineExceeded("Deadline expired before the call was made")
+    return httpx.Timeout(remaining), {DEADLINE_HEADER: str(int(deadline * 1000))}
+
+
+async def _post(url: str, payload: Dict[str, Any], deadline: Optional[float] = None,
+                headers: Optional[Dict[str, str]] = None) -> Any:
+    timeout, deadline_headers = _request_options(deadline)
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            resp = await client.post(url, json=payload, headers={**deadline_headers, **(headers or {})})
+            resp.raise_for_status()
+            return resp.json()
+    except httpx.TimeoutException as e:
+        METRICS["timeouts"] += 1
+        if deadline is not None:
+            raise DeadlineExceeded(f"Deadline exceeded calling {url}") from e
+        raise
+    except httpx.HTTPStatusError as e:
+        # Services answer 504 when the propagated deadline ran out on their side
+        if e.response.status_code == 504:
+            METRICS["timeouts"] += 1
+            raise DeadlineExceeded(f"Deadline exceeded in {url}") from e
+        raise
+
+async def search_schema(query: str, limit: int = 5, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
     """Search schema index via Explorer Service"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{EXPLORER_URL}/tools/search_schema_index", json={"query": query, "limit": limit})
-        resp.raise_for_status()
-        return resp.json()
+    return await _post(f"{EXPLORER_URL}/tools/search_schema_index", {"query": query, "limit": limit}, deadline)
 
-async def get_table_ddl(table_names: List[str], minimal: bool = True) -> Dict[str, str]:
+async def get_table_ddl(table_names: List[str], minimal: bool = True, deadline: Optional[float] = None) -> Dict[str, str]:
     """Get DDL via Explorer Service"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{EXPLORER_URL}/tools/get_table_ddl", json={"table_names": table_names, "minimal": minimal})
-        resp.raise_for_status()
-        return resp.json()
+    return await _post(f"{EXPLORER_URL}/tools/get_table_ddl", {"table_names": table_names, "minimal": minimal}, deadline)
+
+async def get_table_stats(table_names: List[str], deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """Get row estimates, indexes and partitioning via Explorer Service"""
+    return await _post(f"{EXPLORER_URL}/tools/get_table_stats", {"table_names": table_names}, deadline)
+
+async def get_schema_catalog(deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Get all tables with column profiles via Explorer Service"""
+    return await _post(f"{EXPLORER_URL}/tools/get_schema_catalog", {}, deadline)
 
-async def get_neighbors(table_name: str) -> List[Dict[str, Any]]:
+async def get_neighbors(table_name: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
     """Get table neighbors via Explorer Service"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{EXPLORER_URL}/tools/get_table_neighbors", json={"table_name": table_name})
-        resp.raise_for_status()
-        return resp.json()
+    return await _post(f"{EXPLORER_URL}/tools/get_table_neighbors", {"table_name": table_name}, deadline)
 
-async def get_column_samples(table_name: str, column_name: str) -> List[Any]:
+async def get_column_samples(table_name: str, column_name: str, deadline: Optional[float] = None) -> List[Any]:
     """Get column samples via Explorer Service"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{EXPLORER_URL}/tools/get_column_samples", json={"table_name": table_name, "column_name": column_name})
-        resp.raise_for_status()
-        return resp.json()
-
-async def execute_query(sql: str) -> List[Dict[str, Any]]:
-    """Execute SQL query via Executor Service"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{EXECUTOR_URL}/mcp/execute_sql_query", json={"sql": sql})
-        resp.raise_for_status()
-        return resp.json()
+    return await _post(
+        f"{EXPLORER_URL}/tools/get_column_samples",
+        {"table_name": table_name, "column_name": column_name},
+        deadline
+    )
+
+async def execute_query(sql: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Execute SQL query via Executor Service. If the call is abandoned (deadline
+    expiry or task cancellation), the running statement is cancelled on the
+    executor so it does not keep holding a connection.
+    """
+    request_id = uuid.uuid4().hex
+    try:
+        return await _post(
+            f"{EXECUTOR_URL}/mcp/execute_sql_query", {"sql": sql}, deadline,
+            headers={REQUEST_ID_HEADER: request_id}
+        )
+    except (DeadlineExceeded, asyncio.CancelledError):
+        await cancel_query(request_id)
+        raise
+
+async def cancel_query(request_id: str) -> bool:
+    """Ask the Executor Service to cancel a running statement (best effort)"""
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
+            resp = await client.post(f"{EXECUTOR_URL}/mcp/cancel_query", json={"request_id": request_id})
+            resp.raise_for_status()
+            result = resp.json()
+        if result.get("cancelled"):
+            METRICS["cancellations"] += 1
+        return bool(result.get("cancelled"))
+    except Exception as e:
+        print(f"Failed to cancel query {request_id}: {e}")
+        return False
+
+async def explain_query(sql: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Get planner cost estimates for a SQL query via Executor Service"""
+    return await _post(f"{EXECUTOR_URL}/mcp/explain_sql_query", {"sql": sql}, deadline)
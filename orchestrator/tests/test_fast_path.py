@@ -0,0 +1,133 @@
+import pytest
+
+from src.fast_path import FastPath, MIN_CONFIDENCE, MAX_ROW_ESTIMATE
+
+
+def _col(name, type_, primary_key=False, unique=False, most_common_vals=None):
+    return {
+        "name": name,
+        "type": type_,
+        "primaryKey": primary_key,
+        "unique": unique,
+        "n_distinct": None,
+        "null_frac": 0.0,
+        "most_common_vals": most_common_vals or [],
+    }
+
+
+# Catalog of postgres_init/init.sql as returned by the explorer's get_schema_catalog
+CATALOG = [
+    {"name": "users", "row_estimate": 3, "columns": [
+        _col("id", "int4", primary_key=True),
+        _col("username", "varchar", unique=True),
+        _col("email", "varchar"),
+        _col("created_at", "timestamp"),
+    ]},
+    {"name": "products", "row_estimate": 4, "columns": [
+        _col("id", "int4", primary_key=True),
+        _col("name", "varchar"),
+        _col("price", "numeric"),
+        _col("stock", "int4"),
+    ]},
+    {"name": "orders", "row_estimate": 3, "columns": [
+        _col("id", "int4", primary_key=True),
+        _col("user_id", "int4"),
+        _col("total_amount", "numeric"),
+        _col("status", "varchar", most_common_vals=["completed", "processing", "pending"]),
+        _col("created_at", "timestamp"),
+    ]},
+    {"name": "order_items", "row_estimate": 4, "columns": [
+        _col("id", "int4", primary_key=True),
+        _col("order_id", "int4"),
+        _col("product_id", "int4"),
+        _col("quantity", "int4"),
+        _col("price", "numeric"),
+    ]},
+]
+
+
+def served(question):
+    """What the agent would run without the LLM: a match at or above the confidence threshold."""
+    match = FastPath().match(question, CATALOG)
+    return match if match and match["confidence"] >= MIN_CONFIDENCE else None
+
+
+@pytest.mark.parametrize("question, intent, sql", [
+    # count
+    ("How many orders are there?", "count", "SELECT COUNT(*) AS count FROM orders"),
+    ("Count users", "count", "SELECT COUNT(*) AS count FROM users"),
+    ("How many order items are there?", "count", "SELECT COUNT(*) AS count FROM order_items"),
+    ("How many pending orders?", "count", "SELECT COUNT(*) AS count FROM orders WHERE status = 'pending'"),
+    ("How many orders have status completed?", "count",
+     "SELECT COUNT(*) AS count FROM orders WHERE status = 'completed'"),
+    # list
+    ("List all products", "list", "SELECT * FROM products LIMIT 1000"),
+    ("Show me all users", "list", "SELECT * FROM users LIMIT 1000"),
+    ("List product names", "list", "SELECT name FROM products LIMIT 1000"),
+    ("List users by username", "list", "SELECT * FROM users ORDER BY username LIMIT 1000"),
+    ("Show 5 orders", "list", "SELECT * FROM orders LIMIT 5"),
+    ("Give me 5 orders", "list", "SELECT * FROM orders LIMIT 5"),
+    # top_n
+    ("Top 5 products by price", "top_n", "SELECT * FROM products ORDER BY price DESC LIMIT 5"),
+    ("Latest 3 orders", "top_n", "SELECT * FROM orders ORDER BY created_at DESC LIMIT 3"),
+    ("Show the latest orders", "top_n", "SELECT * FROM orders ORDER BY created_at DESC LIMIT 10"),
+    # a singular table noun asks for one row
+    ("Show the latest order", "top_n", "SELECT * FROM orders ORDER BY created_at DESC LIMIT 1"),
+    ("Oldest user", "top_n", "SELECT * FROM users ORDER BY created_at ASC LIMIT 1"),
+    # filter
+    ("Show pending orders", "filter", "SELECT * FROM orders WHERE status = 'pending' LIMIT 1000"),
+    ("Show orders where status is 'processing'", "filter",
+     "SELECT * FROM orders WHERE status = 'processing' LIMIT 1000"),
+    ("Show products with stock 10", "filter", "SELECT * FROM products WHERE stock = 10 LIMIT 1000"),
+])
+def test_serves_template_questions(question, intent, sql):
+    match = served(question)
+    assert match is not None
+    assert match["intent"] == intent
+    assert match["sql"] == sql
+
+
+@pytest.mark.parametrize("question", [
+    # negation
+    "How many orders are not pending?",
+    "Show users without orders",
+    # comparison
+    "Which products are out of stock?",
+    "Show products cheaper than 100",
+    "List orders with total amount over 500",
+    # disjunction
+    "Show pending or processing orders",
+    # aggregation and joins
+    "Total revenue of completed orders",
+    "Average price of products",
+    "How many users placed orders?",
+    "Show me all users who bought a Laptop",
+    "List orders and users",
+    # no table, or contradictory filters
+    "top 10",
+    "Show pending orders with status completed",
+    # numbers that are values rather than row counts
+    "Get order 42",
+    "find user 12",
+    "show product 7",
+    "Show orders in 2023",
+    "Show the 2023 orders",
+    # prepositional conditions
+    "List products in stock",
+])
+def test_declines_outside_templates(question):
+    # Declined by the matcher itself, not only by the confidence threshold
+    assert FastPath().match(question, CATALOG) is None
+
+
+@pytest.mark.parametrize("question, served_on_large_table", [
+    ("How many orders are there?", False),
+    ("Show pending orders", False),
+    ("Top 5 products by price", False),
+    ("List all products", True),
+])
+def test_large_tables_skip_counts_sorts_and_filters(question, served_on_large_table):
+    # These would bypass the EXPLAIN gate, so they are left to the LLM path
+    large = [dict(t, row_estimate=MAX_ROW_ESTIMATE + 1) for t in CATALOG]
+    match = FastPath().match(question, large)
+    assert (match is not None) == served_on_large_table
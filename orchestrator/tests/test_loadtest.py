@@ -0,0 +1,78 @@
+import pytest
+
+from src.loadtest import percentile, detect_saturation
+
+
+def _stage(concurrency, throughput_rps, p95_ms, error_rate=0.0):
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": throughput_rps,
+        "error_rate": error_rate,
+        "latency": {"agent.total": {"p95_ms": p95_ms}},
+    }
+
+
+@pytest.mark.parametrize("pct, expected", [
+    (50, 50),
+    (95, 95),
+    (99, 99),
+    (100, 100),
+])
+def test_percentile_nearest_rank(pct, expected):
+    assert percentile(list(range(1, 101)), pct) == expected
+
+
+def test_percentile_of_empty_is_none():
+    assert percentile([], 95) is None
+
+
+def test_saturation_on_error_rate():
+    stages = [
+        _stage(1, 10.0, 100),
+        _stage(2, 19.0, 110),
+        _stage(4, 30.0, 120, error_rate=0.2),
+    ]
+    report = detect_saturation(stages)
+    assert report["saturated"] is True
+    assert report["saturation_concurrency"] == 4
+    assert report["max_sustainable_concurrency"] == 2
+    assert "error rate" in report["reason"]
+
+
+def test_saturation_on_flat_throughput_and_growing_p95():
+    stages = [
+        _stage(1, 10.0, 100),
+        _stage(2, 19.0, 110),
+        _stage(4, 19.5, 400),
+    ]
+    report = detect_saturation(stages)
+    assert report["saturated"] is True
+    assert report["saturation_concurrency"] == 4
+    assert report["max_sustainable_concurrency"] == 2
+    assert "throughput gain" in report["reason"]
+
+
+def test_flat_throughput_alone_is_not_saturation():
+    # p95 stayed put, so the stage is not penalised for the lack of gain
+    stages = [
+        _stage(1, 10.0, 100),
+        _stage(2, 10.5, 105),
+    ]
+    assert detect_saturation(stages)["saturated"] is False
+
+
+def test_no_saturation_when_throughput_scales():
+    stages = [
+        _stage(4, 38.0, 120),
+        _stage(1, 10.0, 100),
+        _stage(2, 19.0, 110),
+    ]
+    report = detect_saturation(stages)
+    assert report == {
+        "saturated": False,
+        "saturation_concurrency": None,
+        "max_sustainable_concurrency": 4,
+        "reason": None,
+    }
+    # The scratch p95 is not left behind on the caller's stages
+    assert all("_p95" not in s for s in stages)
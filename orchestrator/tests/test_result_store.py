@@ -0,0 +1,92 @@
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import pytest
+
+from src.result_store import ResultStore
+
+
+ROWS = [{"id": i, "name": f"product-{i}", "price": i * 1.5} for i in range(1000)]
+
+
+def test_small_result_stays_in_memory(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1 << 30, spill_dir=str(tmp_path))
+    handle = store.put_rows(ROWS)
+    assert handle["path"] is None
+    assert handle["columns"] == ["id", "name", "price"]
+    assert handle["num_rows"] == 1000
+    assert os.listdir(tmp_path) == []
+
+
+def test_spills_above_threshold_and_previews_from_disk(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1024, spill_dir=str(tmp_path))
+    handle = store.put_rows(ROWS)
+    assert handle["path"] is not None
+    assert os.path.exists(handle["path"])
+    assert store.preview(handle, limit=3) == ROWS[:3]
+    assert store.get_table(handle).num_rows == 1000
+
+
+def test_release_deletes_spill_file(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1024, spill_dir=str(tmp_path))
+    handle = store.put_rows(ROWS)
+    store.release(handle)
+    assert not os.path.exists(handle["path"])
+
+
+def test_release_forgets_in_memory_result(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1 << 30, spill_dir=str(tmp_path))
+    handle = store.put_rows(ROWS)
+    store.release(handle)
+    with pytest.raises(KeyError):
+        store.get_table(handle)
+
+
+def test_evicting_least_recently_used_deletes_its_spill_file(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1024, spill_dir=str(tmp_path), max_results=2)
+    first = store.put_rows(ROWS)
+    second = store.put_rows(ROWS)
+    # Touching the first makes the second the least recently used
+    store.preview(first)
+    third = store.put_rows(ROWS)
+
+    assert os.path.exists(first["path"])
+    assert not os.path.exists(second["path"])
+    assert os.path.exists(third["path"])
+
+
+def test_evicted_in_memory_result_is_dropped(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1 << 30, spill_dir=str(tmp_path), max_results=1)
+    first = store.put_rows(ROWS)
+    second = store.put_rows(ROWS)
+    with pytest.raises(KeyError):
+        store.get_table(first)
+    assert store.get_table(second).num_rows == 1000
+
+
+def test_mixed_type_column_falls_back_to_strings():
+    array = ResultStore._to_array([1, "two", None, 3.5])
+    assert array.type == pa.string()
+    assert array.to_pylist() == ["1", "two", None, "3.5"]
+
+
+def test_empty_result(tmp_path):
+    store = ResultStore(spill_dir=str(tmp_path))
+    handle = store.put_rows([])
+    assert handle["columns"] == []
+    assert store.preview(handle) == []
+
+
+def test_export_csv_and_parquet(tmp_path):
+    store = ResultStore(spill_threshold_bytes=1024, spill_dir=str(tmp_path / "spill"))
+    handle = store.put_rows(ROWS)
+
+    csv_path = str(tmp_path / "out.csv")
+    store.export_csv(handle, csv_path)
+    assert pacsv.read_csv(csv_path).num_rows == 1000
+
+    parquet_path = str(tmp_path / "out.parquet")
+    store.export_parquet(handle, parquet_path)
+    assert pq.read_table(parquet_path).to_pylist() == ROWS
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import StateGraph, END
+
+from src.sessions import SessionStore, new_concepts
+
+ORDERS = {
+    "name": "orders",
+    "ddl_minimal": "TABLE orders (id int4, user_id int4, total_amount numeric, status varchar, created_at timestamp)",
+}
+ORDER_ITEMS = {
+    "name": "order_items",
+    "ddl_minimal": "TABLE order_items (id int4, order_id int4, product_id int4, quantity int4, price numeric)",
+}
+
+
+@pytest.mark.parametrize("question, tables, expected", [
+    # user_id is a reference, not the users table
+    ("only for users in Germany", [ORDERS], ["users", "germany"]),
+    ("now by status", [ORDERS], []),
+    ("sort them by total amount", [ORDERS], []),
+    ("same but for each order", [ORDERS], []),
+    ("include the product names", [ORDER_ITEMS], ["product", "names"]),
+    ("only quantities above 2", [ORDER_ITEMS], []),
+    ("only items with quantity above 2", [ORDER_ITEMS], []),
+    ("and their customers", [ORDERS, ORDER_ITEMS], ["customers"]),
+])
+def test_new_concepts(question, tables, expected):
+    assert new_concepts(question, tables) == expected
+
+
+class _State(TypedDict):
+    turns: int
+
+
+def _graph(saver):
+    workflow = StateGraph(_State)
+    workflow.add_node("step", lambda state: {"turns": state["turns"] + 1})
+    workflow.set_entry_point("step")
+    workflow.add_edge("step", END)
+    return workflow.compile(checkpointer=saver)
+
+
+async def _run_turn(store, graph, session_id):
+    await store.touch(session_id)
+    await graph.ainvoke({"turns": 0}, {"configurable": {"thread_id": session_id}})
+
+
+async def _has_checkpoint(graph, session_id):
+    state = await graph.aget_state({"configurable": {"thread_id": session_id}})
+    return bool(state.values)
+
+
+def test_touch_counts_turns(tmp_path):
+    async def scenario():
+        store = SessionStore(str(tmp_path / "sessions.sqlite"), ttl_seconds=60, max_sessions=10)
+        try:
+            assert await store.touch("a") == 1
+            assert await store.touch("a") == 2
+            assert await store.touch("b") == 1
+        finally:
+            await store.close()
+    asyncio.run(scenario())
+
+
+def test_evicts_sessions_past_ttl(tmp_path):
+    async def scenario():
+        store = SessionStore(str(tmp_path / "sessions.sqlite"), ttl_seconds=0.2, max_sessions=10)
+        try:
+            graph = _graph(await store.open())
+            await _run_turn(store, graph, "stale")
+            time.sleep(0.3)
+            await _run_turn(store, graph, "fresh")
+            assert not await _has_checkpoint(graph, "stale")
+            assert await _has_checkpoint(graph, "fresh")
+            # A returning stale session starts over
+            assert await store.touch("stale") == 1
+        finally:
+            await store.close()
+    asyncio.run(scenario())
+
+
+def test_evicts_least_recently_used_beyond_limit(tmp_path):
+    async def scenario():
+        store = SessionStore(str(tmp_path / "sessions.sqlite"), ttl_seconds=60, max_sessions=2)
+        try:
+            graph = _graph(await store.open())
+            for session_id in ("a", "b"):
+                await _run_turn(store, graph, session_id)
+                time.sleep(0.01)
+            await _run_turn(store, graph, "a")
+            time.sleep(0.01)
+            await _run_turn(store, graph, "c")
+            assert not await _has_checkpoint(graph, "b")
+            assert await _has_checkpoint(graph, "a")
+            assert await _has_checkpoint(graph, "c")
+        finally:
+            await store.close()
+    asyncio.run(scenario())